@@ -0,0 +1,66 @@
+"""
+Benchmark the batched embedding pipeline used by MindMateVectorStore.add_document.
+
+Reports chunks/sec for 1, 2, 4 and N (= CPU count) workers on a synthetic corpus.
+
+Usage (from backend/):
+    python benchmarks/bench_embedding_pipeline.py --chunks 2000 --batch-size 64
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import make_corpus  # noqa: E402
+from mindmate_app.rag.embedding_pipeline import BatchedEmbedder  # noqa: E402
+from mindmate_app.rag.vector_store import EMBEDDING_MODEL_NAME  # noqa: E402
+
+
+def run(corpus: list[str], batch_size: int, num_workers: int) -> float:
+    from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+    embedding_function = SentenceTransformerEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+    embedder = BatchedEmbedder(
+        embedding_function=embedding_function,
+        model_name=EMBEDDING_MODEL_NAME,
+        batch_size=batch_size,
+        num_workers=num_workers,
+    )
+    try:
+        # Warm up so model loading is not counted
+        for _ in embedder.embed_stream(corpus[: batch_size * num_workers]):
+            pass
+
+        start = time.perf_counter()
+        total = 0
+        for texts, _vectors in embedder.embed_stream(corpus):
+            total += len(texts)
+        elapsed = time.perf_counter() - start
+    finally:
+        embedder.close()
+
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.chunks)
+    cpu_count = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cpu_count})
+
+    print(f"{args.chunks} chunks, batch size {args.batch_size}")
+    print(f"{'workers':>8}  {'chunks/sec':>12}")
+    for n in worker_counts:
+        rate = run(corpus, args.batch_size, n)
+        print(f"{n:>8}  {rate:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark flashcard persistence: the old one-INSERT-per-card loop against
+save_flashcards (bulk_create in one transaction) and the batched bulk
+import path.
+
+Runs against a throwaway on-disk SQLite database created with the app's
+migrations, so commit/fsync costs are included.
+
+Usage (from backend/):
+    python benchmarks/bench_flashcard_inserts.py --sets 20 --cards 50 --import-rows 10000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindmate_backend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from mindmate_app.flashcard_import import (  # noqa: E402
+    import_flashcards,
+    iter_rows,
+    save_flashcards,
+)
+from mindmate_app.models import Flashcard  # noqa: E402
+
+
+def make_cards(n: int, offset: int = 0) -> list[dict]:
+    return [
+        {
+            "question": f"What is concept {offset + i}?",
+            "answer": f"Concept {offset + i} is explained in chapter {i % 12}.",
+            "tag": "bench",
+        }
+        for i in range(n)
+    ]
+
+
+def loop_create(topic, cards_data):
+    # the previous FlashcardView persistence code
+    return [
+        Flashcard.objects.create(
+            topic=topic,
+            question=c.get("question", ""),
+            answer=c.get("answer", ""),
+            tag=c.get("tag") or None,
+        )
+        for c in cards_data
+    ]
+
+
+def rate(fn, total_rows: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return total_rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sets", type=int, default=20, help="generated sets to save")
+    parser.add_argument("--cards", type=int, default=50, help="cards per generated set")
+    parser.add_argument("--import-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = str(Path(tmp) / "bench.sqlite3")
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            sets = [make_cards(args.cards, offset=i * args.cards) for i in range(args.sets)]
+            total = args.sets * args.cards
+
+            loop = rate(lambda: [loop_create("bench", s) for s in sets], total)
+            bulk = rate(lambda: [save_flashcards("bench", s) for s in sets], total)
+
+            header = "question,answer,tag\n"
+            csv_body = header + "".join(
+                f'"{c["question"]}","{c["answer"]}",{c["tag"]}\n'
+                for c in make_cards(args.import_rows)
+            )
+            import_rate = rate(
+                lambda: import_flashcards(
+                    iter_rows(io.BytesIO(csv_body.encode("utf-8")), "csv"), topic="bench"
+                ),
+                args.import_rows,
+            )
+            import_loop = rate(
+                lambda: loop_create("bench", make_cards(args.import_rows)),
+                args.import_rows,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{args.sets} generated sets x {args.cards} cards")
+    print(f"{'path':<36}  {'rows/sec':>10}")
+    print(f"{'create() loop':<36}  {loop:>10.0f}")
+    print(f"{'save_flashcards (bulk_create)':<36}  {bulk:>10.0f}")
+    print(f"\nimport of {args.import_rows} rows")
+    print(f"{'create() loop':<36}  {import_loop:>10.0f}")
+    print(f"{'import_flashcards (CSV, batched)':<36}  {import_rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark how gunicorn-style workers get the embedding model:
+
+  per-worker  every forked worker loads its own copy (the old behaviour)
+  preload     the parent loads it once, gc.freeze()s and forks
+              (what gunicorn.conf.py does)
+  socket      workers hold no model and call the embedding server
+
+For each mode it reports the worker's model load time and first-query
+latency (the cold start a first request pays), plus RSS / USS / PSS per
+worker and the PSS total of every process involved. PSS splits shared
+pages between the processes sharing them, so the total is the real
+memory cost. All workers are alive when memory is read. Linux only
+(/proc/<pid>/smaps_rollup).
+
+--model minilm uses the real all-MiniLM-L6-v2 (needs
+sentence-transformers). --model synthetic:<MB> uses a stand-in holding
+<MB> of weights in one array, to measure the sharing mechanism where the
+model isn't available.
+
+Usage (from backend/):
+    python benchmarks/bench_model_loading.py --workers 4 --model minilm
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import HashingEmbeddings  # noqa: E402
+from mindmate_app.rag.embedding_server import SocketEmbeddings, serve  # noqa: E402
+
+
+class SyntheticModel(HashingEmbeddings):
+    """
+    HashingEmbeddings plus `mb` of read-only "weights" touched on every call.
+    """
+
+    def __init__(self, mb: int, dim: int = 384):
+        super().__init__(dim)
+        rng = np.random.default_rng(0)
+        self.weights = rng.standard_normal((mb * 1024 * 1024) // 4, dtype=np.float32)
+
+    def _embed(self, text):
+        vector = super()._embed(text)
+        # read (never write) the weights, like inference does
+        self.weights[:: 4096].sum()
+        return vector
+
+
+def load_model(spec: str):
+    if spec == "minilm":
+        from mindmate_app.rag.vector_store import load_embedding_model
+
+        return load_embedding_model()
+    return SyntheticModel(int(spec.split(":", 1)[1]))
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def worker(mode, spec, socket_path, preloaded, results, release):
+    start = time.perf_counter()
+    if mode == "per-worker":
+        model = load_model(spec)
+    elif mode == "preload":
+        model = preloaded
+    else:
+        model = SocketEmbeddings(socket_path)
+    loaded = time.perf_counter()
+    model.embed_query("what is an eigenvalue?")
+    first = time.perf_counter()
+    results.put((os.getpid(), loaded - start, first - loaded))
+    release.wait()
+
+
+def run(mode: str, spec: str, workers: int) -> Dict[str, float]:
+    ctx = mp.get_context("fork")
+    results, release = ctx.Queue(), ctx.Event()
+    extra_pids: List[int] = []
+    server = None
+    preloaded = None
+    socket_path = str(Path(tempfile.mkdtemp()) / "embed.sock")
+
+    if mode == "preload":
+        import gc
+
+        preloaded = load_model(spec)
+        gc.freeze()
+    elif mode == "socket":
+        server = ctx.Process(target=lambda: serve(socket_path, load_model(spec)))
+        server.start()
+        while not os.path.exists(socket_path):
+            time.sleep(0.05)
+        extra_pids.append(server.pid)
+
+    procs = [
+        ctx.Process(
+            target=worker,
+            args=(mode, spec, socket_path, preloaded, results, release),
+        )
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+
+    per_worker = [memory_kb(pid) for pid, _, _ in stats]
+    # the parent holds the preloaded copy; the server holds the socket one
+    owners = [memory_kb(os.getpid())] if mode == "preload" else []
+    owners += [memory_kb(pid) for pid in extra_pids]
+
+    release.set()
+    for p in procs:
+        p.join()
+    if server is not None:
+        server.terminate()
+        server.join()
+
+    def mean(values):
+        return sum(values) / len(values)
+
+    return {
+        "load_s": mean([s[1] for s in stats]),
+        "first_query_ms": mean([s[2] for s in stats]) * 1000,
+        "rss_mb": mean([m["rss"] for m in per_worker]) / 1024,
+        "uss_mb": mean([m["uss"] for m in per_worker]) / 1024,
+        "pss_mb": mean([m["pss"] for m in per_worker]) / 1024,
+        "total_pss_mb": sum(m["pss"] for m in per_worker + owners) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", default="minilm", help="minilm or synthetic:<MB>")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, model {args.model}")
+    print(
+        f"{'mode':<11}  {'load s':>7}  {'1st query ms':>12}  {'RSS MB':>7}  "
+        f"{'USS MB':>7}  {'PSS MB':>7}  {'total PSS MB':>12}"
+    )
+    for mode in ("per-worker", "preload", "socket"):
+        r = run(mode, args.model, args.workers)
+        print(
+            f"{mode:<11}  {r['load_s']:>7.2f}  {r['first_query_ms']:>12.1f}  {r['rss_mb']:>7.1f}  "
+            f"{r['uss_mb']:>7.1f}  {r['pss_mb']:>7.1f}  {r['total_pss_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
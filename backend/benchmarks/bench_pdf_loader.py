@@ -0,0 +1,144 @@
+"""
+Benchmark PDF extraction + chunking: the old load-everything path
+(load_pdf_text, then one split_text over the joined string) against
+iter_pdf_pages feeding the splitter page by page, in-process and with a
+worker pool.
+
+Each mode runs in a fresh subprocess so peak RSS (ru_maxrss) is measured
+per mode; "growth" is the peak minus the RSS after imports, and pool
+workers are reported separately. All modes keep the chunk list, as
+add_pages does. A synthetic text PDF is generated first.
+
+Usage (from backend/):
+    python benchmarks/bench_pdf_loader.py --pages 1000 --workers 4
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import make_corpus  # noqa: E402
+
+LINES_PER_PAGE = 45
+CHARS_PER_LINE = 90
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: int) -> None:
+    """
+    Write a `pages`-page PDF of plain Helvetica text (~4 KB per page).
+    """
+    lines = make_corpus(pages * LINES_PER_PAGE, chunk_chars=CHARS_PER_LINE)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for p in range(pages):
+        body = ["BT /F1 9 Tf 11 TL 40 800 Td"]
+        for line in lines[p * LINES_PER_PAGE:(p + 1) * LINES_PER_PAGE]:
+            body.append(f"({_escape(line)}) Tj T*")
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Count %d /Kids [%s] >>" % (pages, b" ".join(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+
+
+def run_mode(pdf: str, mode: str, workers: int) -> dict:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from mindmate_app.rag.document_loader import iter_pdf_pages, load_pdf_text
+
+    # same settings as MindMateVectorStore
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    if mode == "joined":
+        chunks = splitter.split_text(load_pdf_text(pdf))
+    else:
+        chunks = [
+            chunk
+            for _, text in iter_pdf_pages(pdf, num_workers=workers)
+            for chunk in splitter.split_text(text)
+        ]
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "chunks": len(chunks),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "baseline_mb": baseline,
+        # largest pool worker, if any
+        "worker_peak_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--run", nargs=3, metavar=("PDF", "MODE", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        pdf, mode, workers = args.run
+        print(json.dumps(run_mode(pdf, mode, int(workers))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp) / "bench.pdf"
+        write_pdf(pdf, args.pages)
+        size_mb = pdf.stat().st_size / 1e6
+        print(f"{args.pages} pages, {size_mb:.1f} MB PDF")
+        print(f"{'mode':<28}  {'seconds':>8}  {'chunks':>7}  {'peak RSS MB':>11}  {'growth MB':>9}  {'worker MB':>9}")
+        modes = [("joined", 1), ("pages", 1)]
+        if args.workers > 1:
+            modes.append(("pages", args.workers))
+        for mode, workers in modes:
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", str(pdf), mode, str(workers)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            label = "load_pdf_text + split" if mode == "joined" else f"iter_pdf_pages, {workers} worker(s)"
+            print(
+                f"{label:<28}  {r['seconds']:>8.2f}  {r['chunks']:>7}  "
+                f"{r['peak_rss_mb']:>11.1f}  {r['peak_rss_mb'] - r['baseline_mb']:>9.1f}  {r['worker_peak_mb']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
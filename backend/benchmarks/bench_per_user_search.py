@@ -0,0 +1,72 @@
+"""
+Benchmark search latency as the number of users grows.
+
+Every user indexes the same amount of text. With per-user collections the
+latency of one user's search should stay flat, however many other users
+exist. The shared-collection baseline (everything in one collection,
+filtered by user_id metadata) is shown for comparison.
+
+Usage (from backend/):
+    python benchmarks/bench_per_user_search.py --users 1 10 50 200 --chunks-per-user 200
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import HashingEmbeddings, make_corpus  # noqa: E402
+from mindmate_app.rag.vector_store import MindMateVectorStore  # noqa: E402
+
+QUERIES = ["enzyme energy", "matrix eigenvalue", "market inflation", "graph recursion"]
+
+
+def time_searches(search, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        for q in QUERIES:
+            start = time.perf_counter()
+            search(q)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(num_users: int, chunks_per_user: int, repeats: int) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MindMateVectorStore(
+            persist_directory=tmp, embedding_function=HashingEmbeddings()
+        )
+        # ~one 500-char chunk per corpus entry
+        for user_id in range(1, num_users + 1):
+            text = "\n\n".join(make_corpus(chunks_per_user, seed=user_id))
+            meta = {"title": f"notes {user_id}", "source": f"document:{user_id}"}
+            store.add_document(text, meta, user_id=user_id)
+            store.add_document(text, meta | {"user_id": user_id})  # shared baseline
+
+        shared = store.get_db(None)
+        per_user = time_searches(lambda q: store.search(q, k=4, user_id=1), repeats)
+        baseline = time_searches(
+            lambda q: shared.similarity_search(q, k=4, filter={"user_id": 1}), repeats
+        )
+    return per_user, baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--chunks-per-user", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{args.chunks_per_user} chunks per user, median of {args.repeats * len(QUERIES)} searches")
+    print(f"{'users':>6}  {'per-user ms':>12}  {'shared+filter ms':>17}")
+    for n in args.users:
+        per_user, baseline = run(n, args.chunks_per_user, args.repeats)
+        print(f"{n:>6}  {per_user:>12.2f}  {baseline:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
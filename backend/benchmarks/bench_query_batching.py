@@ -0,0 +1,136 @@
+"""
+Benchmark query-embedding throughput with and without QueryCoalescer
+(mindmate_app/rag/query_coalescer.py) at 1, 8 and 64 concurrent callers.
+
+Each caller thread embeds --queries distinct query strings back to back,
+the way concurrent explain/quiz/chat requests reach the vector store. The
+report lists queries/sec, p50/p99 latency and the coalescer's average
+batch size.
+
+--model minilm uses the real all-MiniLM-L6-v2 (needs
+sentence-transformers). --model synthetic (the default) is a stand-in
+that hashes the text into features and runs them through a few dense
+numpy layers, so, like a real model, one call per batch reads the
+weights once and the per-call cost is amortised by batching.
+
+Usage (from backend/):
+    python benchmarks/bench_query_batching.py --model minilm --window-ms 2
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import HashingEmbeddings, make_corpus  # noqa: E402
+from mindmate_app.rag.query_coalescer import QueryCoalescer  # noqa: E402
+
+
+class SyntheticDenseModel(HashingEmbeddings):
+    """
+    Hashed bag-of-words features followed by `layers` dense layers.
+    """
+
+    def __init__(self, dim: int = 384, hidden: int = 1536, layers: int = 4):
+        super().__init__(dim)
+        rng = np.random.default_rng(0)
+        sizes = [dim] + [hidden] * (layers - 1) + [dim]
+        self.weights = [
+            rng.standard_normal((a, b), dtype=np.float32) / np.sqrt(a)
+            for a, b in zip(sizes, sizes[1:])
+        ]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        x = np.array([self._embed(t) for t in texts], dtype=np.float32)
+        for w in self.weights:
+            x = np.tanh(x @ w)
+        x /= np.linalg.norm(x, axis=1, keepdims=True) + 1e-12
+        return x.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_model(spec: str):
+    if spec == "minilm":
+        from mindmate_app.rag.vector_store import load_embedding_model
+
+        return load_embedding_model()
+    return SyntheticDenseModel()
+
+
+def run(embedder, callers: int, queries: int) -> Dict[str, float]:
+    texts = make_corpus(callers * queries, chunk_chars=60, seed=callers)
+    latencies: List[float] = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(callers + 1)
+
+    def caller(offset: int):
+        own = []
+        start_barrier.wait()
+        for text in texts[offset:offset + queries]:
+            t0 = time.perf_counter()
+            embedder.embed_query(text)
+            own.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(own)
+
+    threads = [
+        threading.Thread(target=caller, args=(i * queries,)) for i in range(callers)
+    ]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="synthetic", help="minilm or synthetic")
+    parser.add_argument("--callers", default="1,8,64")
+    parser.add_argument("--queries", type=int, default=50, help="per caller")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    model.embed_query("warm up")
+
+    print(
+        f"model {args.model}, {args.queries} queries per caller, "
+        f"window {args.window_ms}ms, max batch {args.max_batch}"
+    )
+    print(
+        f"{'callers':>7}  {'mode':<9}  {'queries/s':>9}  {'p50 ms':>7}  "
+        f"{'p99 ms':>7}  {'avg batch':>9}"
+    )
+    for callers in [int(c) for c in args.callers.split(",")]:
+        direct = run(model, callers, args.queries)
+        coalescer = QueryCoalescer(model, args.window_ms, args.max_batch)
+        batched = run(coalescer, callers, args.queries)
+        avg_batch = coalescer.stats()["avg_batch_size"]
+        for mode, r, batch in (("direct", direct, 1.0), ("coalesced", batched, avg_batch)):
+            print(
+                f"{callers:>7}  {mode:<9}  {r['qps']:>9.0f}  {r['p50_ms']:>7.2f}  "
+                f"{r['p99_ms']:>7.2f}  {batch:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
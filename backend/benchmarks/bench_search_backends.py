@@ -0,0 +1,75 @@
+"""
+Compare the exact NumPy search backend with Chroma at different collection sizes.
+
+Usage (from backend/):
+    python benchmarks/bench_search_backends.py --sizes 100 1000 10000
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.common import HashingEmbeddings, make_corpus  # noqa: E402
+from mindmate_app.rag.backends import ChromaBackend  # noqa: E402
+from mindmate_app.rag.vector_store import MindMateVectorStore  # noqa: E402
+
+QUERIES = ["enzyme energy", "matrix eigenvalue", "market inflation", "graph recursion"]
+
+
+def median_ms(search, query_vectors, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        for v in query_vectors:
+            start = time.perf_counter()
+            search(v, 4)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def run(size: int, repeats: int) -> tuple[float, float, float]:
+    embeddings = HashingEmbeddings()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MindMateVectorStore(
+            persist_directory=tmp,
+            embedding_function=embeddings,
+            numpy_max_vectors=size * 10,
+        )
+        store.add_document("\n\n".join(make_corpus(size)), {"source": "bench"}, user_id=1)
+
+        numpy_backend = store.get_backend(user_id=1)
+        assert numpy_backend.name == "numpy"
+        chroma_backend = ChromaBackend(store.get_db(user_id=1))
+        query_vectors = [embeddings.embed_query(q) for q in QUERIES]
+
+        # overlap of the two top-k lists (NumPy is exact, Chroma approximate)
+        overlap = []
+        for v in query_vectors:
+            exact = {r["content"] for r in numpy_backend.search(v, 4)}
+            approx = {r["content"] for r in chroma_backend.search(v, 4)}
+            overlap.append(len(exact & approx) / max(1, len(exact)))
+
+        return (
+            median_ms(numpy_backend.search, query_vectors, repeats),
+            median_ms(chroma_backend.search, query_vectors, repeats),
+            statistics.mean(overlap),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"{'chunks':>7}  {'numpy ms':>9}  {'chroma ms':>10}  {'recall@4':>9}")
+    for size in args.sizes:
+        numpy_ms, chroma_ms, recall = run(size, args.repeats)
+        print(f"{size:>7}  {numpy_ms:>9.3f}  {chroma_ms:>10.3f}  {recall:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Startup benchmark: how long `manage.py check` takes, and how long a fresh
+process takes to answer its first /api/health/ request. Both run under
+`python -X importtime`, so the report lists the slowest imports. Exits
+non-zero if a budget is exceeded, or if a heavy module (langchain,
+chromadb, groq, numpy, pypdf, torch...) got imported on either path;
+those belong behind the lazy facade in mindmate_app/ai.py.
+
+Each measurement is the best of --runs fresh processes.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --check-budget 1.0 --health-budget 1.5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = (
+    "chromadb",
+    "groq",
+    "langchain",
+    "langchain_community",
+    "langchain_core",
+    "langchain_text_splitters",
+    "numpy",
+    "pypdf",
+    "sentence_transformers",
+    "torch",
+)
+
+HEALTH_SCRIPT = """
+import os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mindmate_backend.settings")
+import django
+django.setup()
+from django.test import Client
+response = Client().get("/api/health/")
+assert response.status_code == 200, response.status_code
+print(time.time())
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Module -> cumulative import time in microseconds.
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+def timed_run(args: List[str]) -> Tuple[float, Dict[str, int]]:
+    """
+    Run `python -X importtime <args>` from backend/ and return
+    (seconds until the process finished or printed its end time, imports).
+    """
+    start = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env=os.environ | {"PYTHONPATH": str(BACKEND_DIR)},
+    )
+    end = time.time()
+    if proc.returncode != 0:
+        sys.exit(f"{' '.join(args)} failed:\n{proc.stderr[-2000:]}")
+    out = proc.stdout.strip().splitlines()
+    if out:
+        try:
+            end = float(out[-1])
+        except ValueError:
+            pass
+    return end - start, parse_importtime(proc.stderr)
+
+
+def best_of(runs: int, args: List[str]) -> Tuple[float, Dict[str, int]]:
+    return min((timed_run(args) for _ in range(runs)), key=lambda r: r[0])
+
+
+def report(label: str, seconds: float, budget: float, imports: Dict[str, int], top: int) -> List[str]:
+    print(f"\n{label}: {seconds:.2f}s (budget {budget:.2f}s)")
+    for name, us in sorted(imports.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if seconds > budget:
+        failures.append(f"{label} took {seconds:.2f}s, budget is {budget:.2f}s")
+    heavy = sorted(name for name in imports if name.split(".")[0] in HEAVY_MODULES)
+    if heavy:
+        roots = sorted({name.split(".")[0] for name in heavy})
+        failures.append(f"{label} imported {', '.join(roots)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--check-budget", type=float, default=1.0, help="seconds")
+    parser.add_argument("--health-budget", type=float, default=1.5, help="seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    check_s, check_imports = best_of(args.runs, ["manage.py", "check"])
+    health_s, health_imports = best_of(args.runs, ["-c", HEALTH_SCRIPT])
+
+    failures = report("manage.py check", check_s, args.check_budget, check_imports, args.top)
+    failures += report(
+        "first /api/health/", health_s, args.health_budget, health_imports, args.top
+    )
+
+    if failures:
+        print("\nFAIL")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Shared helpers for the benchmark scripts: a synthetic corpus and a cheap,
+deterministic embedding function so vector-store benchmarks measure the
+store rather than the model.
+"""
+import hashlib
+import math
+import random
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+WORDS = (
+    "cell membrane protein enzyme energy photosynthesis theorem integral "
+    "derivative vector matrix eigenvalue market demand supply inflation "
+    "algorithm complexity recursion graph network history revolution empire"
+).split()
+
+
+def make_corpus(num_chunks: int, chunk_chars: int = 500, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(num_chunks):
+        words = []
+        length = 0
+        while length < chunk_chars:
+            w = rng.choice(WORDS)
+            words.append(w)
+            length += len(w) + 1
+        corpus.append(" ".join(words))
+    return corpus
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Bag-of-words feature hashing into `dim` dimensions, L2-normalised.
+    Similar texts get similar vectors, which is all the benchmarks need.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            h = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little")
+            vector[h % self.dim] += 1.0 if h & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,125 @@
+"""
+A tiny OpenAI/Groq-compatible chat completions server for load tests.
+
+Every request sleeps for --latency seconds (like a real model generating
+tokens) and returns a canned JSON answer that all MindMate endpoints can
+parse. Streaming requests get the same answer as SSE chunks.
+
+Usage (from backend/):
+    python benchmarks/fake_llm_server.py --port 8765 --latency 2.0
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=fake <start the Django server>
+"""
+import argparse
+import asyncio
+import json
+import time
+
+CANNED_CONTENT = json.dumps(
+    {
+        "summary": "Fake summary.",
+        "key_points": ["one", "two"],
+        "cards": [{"question": "Q?", "answer": "A.", "tag": "fake"}],
+        "topic": "fake",
+        "questions": [],
+    }
+)
+
+
+def completion_body(model: str) -> dict:
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": CANNED_CONTENT},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def stream_chunks(model: str):
+    words = CANNED_CONTENT.split(" ")
+    for i, word in enumerate(words):
+        text = word if i == 0 else " " + word
+        yield {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+        }
+
+
+async def handle(reader, writer, latency: float):
+    """
+    Serve requests on one connection until the client closes it.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode().partition(":")
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            payload = json.loads(body or b"{}")
+            model = payload.get("model", "fake")
+
+            await asyncio.sleep(latency)
+
+            if payload.get("stream"):
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                    b"Connection: close\r\n\r\n"
+                )
+                for chunk in stream_chunks(model):
+                    writer.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    await writer.drain()
+                writer.write(b"data: [DONE]\n\n")
+                await writer.drain()
+                break
+
+            data = json.dumps(completion_body(model)).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(data)}\r\n".encode()
+                + b"Connection: keep-alive\r\n\r\n"
+                + data
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError, json.JSONDecodeError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, latency: float):
+    server = await asyncio.start_server(
+        lambda r, w: handle(r, w, latency), host, port, backlog=4096
+    )
+    print(f"Fake LLM listening on http://{host}:{port} (latency {latency}s)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.latency))
+
+
+if __name__ == "__main__":
+    main()
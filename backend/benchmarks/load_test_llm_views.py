@@ -0,0 +1,87 @@
+"""
+Concurrency load test for the LLM-bound endpoints.
+
+Fires N concurrent POSTs at /api/summarize/ (no auth needed) and reports
+throughput and latency. Run it against the same Django code served two ways
+to see the concurrency gain of the async views:
+
+    # terminal 1: fake model with 2s latency
+    python benchmarks/fake_llm_server.py --port 8765 --latency 2.0
+
+    # terminal 2a: sync WSGI workers (old setup)
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=fake \\
+        gunicorn mindmate_backend.wsgi -w 2 --bind 127.0.0.1:8000
+    # terminal 2b: ASGI + uvicorn workers (Procfile)
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=fake \\
+        gunicorn mindmate_backend.asgi:application -k uvicorn.workers.UvicornWorker \\
+        -w 2 --bind 127.0.0.1:8000
+
+    # terminal 3
+    python benchmarks/load_test_llm_views.py --url http://127.0.0.1:8000 \\
+        --concurrency 10 100 300
+
+With 2 sync workers throughput is capped near 2 / latency requests/sec;
+the ASGI workers keep every request in flight at once.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+PAYLOAD = {"notes": "Photosynthesis turns light into chemical energy.", "focus": "exam"}
+
+
+async def one_request(client: httpx.AsyncClient, url: str) -> tuple[bool, float]:
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json=PAYLOAD)
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+async def run(base_url: str, concurrency: int, timeout: float):
+    url = base_url.rstrip("/") + "/api/summarize/"
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(one_request(client, url) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else float("nan"),
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else float("nan"),
+        "wall": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    print(f"{'conc':>5}  {'ok':>5}  {'err':>4}  {'req/s':>7}  {'p50 s':>6}  {'p95 s':>6}  {'wall s':>7}")
+    for c in args.concurrency:
+        r = asyncio.run(run(args.url, c, args.timeout))
+        print(
+            f"{c:>5}  {r['ok']:>5}  {r['errors']:>4}  {r['rps']:>7.1f}  "
+            f"{r['p50']:>6.2f}  {r['p95']:>6.2f}  {r['wall']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
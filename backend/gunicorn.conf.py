@@ -0,0 +1,52 @@
+"""
+Gunicorn settings (picked up automatically when gunicorn runs from backend/).
+
+By default the app is imported and the embedding model loaded once in the
+master before it forks, so workers share the model weights copy-on-write
+and no worker pays the model's cold start on its first request.
+MINDMATE_PRELOAD_MODELS=0 turns this off.
+
+With MINDMATE_EMBEDDING_SOCKET set, workers use the embedding server
+(`python manage.py run_embedding_server`) and hold no model at all.
+
+benchmarks/bench_model_loading.py measures both against per-worker loading.
+
+Each worker also runs the document ingestion loop in a background thread
+(MINDMATE_INGESTION_IN_WEB=0 turns this off), because on hosts where each
+process type gets its own filesystem a separate worker process can't read
+the uploads or write the index the web process searches.
+"""
+import gc
+import os
+
+preload_app = os.getenv("MINDMATE_PRELOAD_MODELS", "1") == "1"
+
+
+def when_ready(server):
+    # runs in the master, after the app is loaded and before workers fork
+    if not preload_app:
+        return
+
+    from django.urls import get_resolver
+
+    from mindmate_app import ai
+    from mindmate_app.rag.vector_store import EMBEDDING_SOCKET, preload_embedding_model
+
+    # import the views and the lazily loaded RAG/LLM stack now rather than
+    # on each worker's first request
+    get_resolver().url_patterns
+    ai.load_all()
+    if not EMBEDDING_SOCKET:
+        seconds = preload_embedding_model()
+        server.log.info("Embedding model loaded in %.1fs", seconds)
+
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the workers don't write to (and un-share) these pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from mindmate_app.ingestion import WORKER_IN_WEB, start_worker_thread
+
+    if WORKER_IN_WEB:
+        start_worker_thread()
@@ -0,0 +1,78 @@
+# mindmate_app/ai.py
+"""
+Lazy facade over the RAG and LLM stack.
+
+rag_service, services and document_loader pull in langchain, chromadb,
+numpy, pypdf and the Groq/httpx clients, which takes most of a second.
+Views and the ingestion queue reach those functions through this module
+(`ai.explain_with_llm_async(...)`), so nothing heavy is imported until
+the first request that needs it. Management commands, migrations and
+/api/health/ never pay for it.
+
+Always go through the module attribute: `from .ai import name` would
+import the backing module straight away.
+"""
+import importlib
+from typing import TYPE_CHECKING, Any
+
+# exported name -> module that defines it
+_EXPORTS = {
+    "chat_with_knowledge_base_async": "mindmate_app.rag.rag_service",
+    "chat_with_knowledge_base_astream": "mindmate_app.rag.rag_service",
+    "delete_document_chunks": "mindmate_app.rag.rag_service",
+    "explain_with_llm_async": "mindmate_app.rag.rag_service",
+    "explain_with_llm_astream": "mindmate_app.rag.rag_service",
+    "get_cache_stats": "mindmate_app.rag.rag_service",
+    "index_document": "mindmate_app.rag.rag_service",
+    "index_pages": "mindmate_app.rag.rag_service",
+    "quiz_with_llm_async": "mindmate_app.rag.rag_service",
+    "quiz_with_llm_astream": "mindmate_app.rag.rag_service",
+    "retrieve_relevant_chunks": "mindmate_app.rag.rag_service",
+    "generate_flashcards": "mindmate_app.services",
+    "generate_flashcards_async": "mindmate_app.services",
+    "summarize_notes": "mindmate_app.services",
+    "summarize_notes_async": "mindmate_app.services",
+    "iter_pdf_pages": "mindmate_app.rag.document_loader",
+    "iter_text_blocks": "mindmate_app.rag.document_loader",
+}
+
+__all__ = sorted(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .rag.document_loader import iter_pdf_pages, iter_text_blocks  # noqa: F401
+    from .rag.rag_service import (  # noqa: F401
+        chat_with_knowledge_base_astream,
+        chat_with_knowledge_base_async,
+        delete_document_chunks,
+        explain_with_llm_astream,
+        explain_with_llm_async,
+        get_cache_stats,
+        index_document,
+        index_pages,
+        quiz_with_llm_astream,
+        quiz_with_llm_async,
+        retrieve_relevant_chunks,
+    )
+    from .services import (  # noqa: F401
+        generate_flashcards,
+        generate_flashcards_async,
+        summarize_notes,
+        summarize_notes_async,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def load_all() -> None:
+    """
+    Import everything now, e.g. in the gunicorn master before it forks.
+    """
+    for name in _EXPORTS:
+        __getattr__(name)
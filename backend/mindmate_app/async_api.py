@@ -0,0 +1,75 @@
+# mindmate_app/async_api.py
+"""
+Minimal async counterpart of DRF's APIView for the LLM-bound endpoints.
+
+DRF views are sync-only, so under ASGI every in-flight LLM call would pin a
+thread. These views run on the event loop instead: authentication and
+database work are pushed to threads with sync_to_async, and the handler
+awaits the async LLM client.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+def _authenticate(request):
+    """
+    Resolve the user from the Bearer token, like DRF's JWTAuthentication.
+    Returns None when no token was sent.
+    """
+    result = JWTAuthentication().authenticate(request)
+    return result[0] if result else None
+
+
+class AsyncAPIView(View):
+    """
+    Base class for async JSON endpoints.
+
+    Subclasses define `async def post(self, request)` and read the parsed
+    JSON body from request.data. Set login_required = True for endpoints
+    that need an authenticated user.
+    """
+
+    login_required = False
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated API, same as DRF's APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return JsonResponse(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+
+        try:
+            user = await sync_to_async(_authenticate)(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+
+        request.user = user or AnonymousUser()
+        if self.login_required and user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+
+        try:
+            request.data = json.loads(request.body.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return JsonResponse(
+                {"detail": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return await handler(request, *args, **kwargs)
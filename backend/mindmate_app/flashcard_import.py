@@ -0,0 +1,219 @@
+# mindmate_app/flashcard_import.py
+"""
+Bulk persistence for flashcards.
+
+save_flashcards writes one generated set with a single bulk INSERT.
+import_flashcards takes an uploaded CSV, JSON array or JSON Lines file of
+any size: rows are read incrementally from the upload and written in
+batches of FLASHCARD_IMPORT_BATCH_SIZE, all inside one transaction so a
+failed import leaves nothing behind.
+
+Files are read as UTF-8, or as UTF-16 when they start with a UTF-16 byte
+order mark (Excel's "Unicode text" export). Anything that can't be
+decoded or parsed raises FlashcardImportError.
+"""
+import codecs
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List
+
+from django.db import transaction
+
+from .models import Flashcard
+
+FLASHCARD_IMPORT_BATCH_SIZE = int(os.getenv("MINDMATE_FLASHCARD_IMPORT_BATCH_SIZE", "500"))
+# Bytes read from the upload at a time while decoding a JSON array
+JSON_READ_SIZE = 64 * 1024
+
+IMPORT_FORMATS = ("csv", "json", "jsonl")
+
+
+class FlashcardImportError(ValueError):
+    """Raised when an import file can't be read."""
+
+
+def _checked(value, field: str, row_number: int) -> str | None:
+    # bulk_create skips field validation, and Postgres rejects over-long values
+    if not value:
+        return None
+    value = str(value).strip()
+    max_length = Flashcard._meta.get_field(field).max_length
+    if len(value) > max_length:
+        raise FlashcardImportError(
+            f"Row {row_number}: {field} is longer than {max_length} characters."
+        )
+    return value or None
+
+
+def _build_card(topic, row: Dict[str, Any], row_number: int) -> Flashcard | None:
+    question = str(row.get("question") or "").strip()
+    answer = str(row.get("answer") or "").strip()
+    if not question or not answer:
+        return None
+    return Flashcard(
+        topic=_checked(row.get("topic") or topic, "topic", row_number),
+        question=question,
+        answer=answer,
+        tag=_checked(row.get("tag"), "tag", row_number),
+    )
+
+
+def save_flashcards(topic, cards_data: List[Dict[str, Any]]) -> List[Flashcard]:
+    """
+    Persist generated cards with one bulk INSERT in one transaction.
+    """
+    flashcards = [
+        Flashcard(
+            topic=topic,
+            question=c.get("question", ""),
+            answer=c.get("answer", ""),
+            tag=c.get("tag") or None,
+        )
+        for c in cards_data
+    ]
+    with transaction.atomic():
+        return Flashcard.objects.bulk_create(flashcards)
+
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    if extension == "ndjson":
+        return "jsonl"
+    if extension not in IMPORT_FORMATS:
+        raise FlashcardImportError("Unsupported file type. Use .csv, .json or .jsonl.")
+    return extension
+
+
+def _encoding(fileobj) -> str:
+    start = fileobj.read(2)
+    fileobj.seek(0)
+    if start in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+        return "utf-16"
+    return "utf-8-sig"
+
+
+def _text_chunks(fileobj) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(_encoding(fileobj))()
+    while True:
+        data = fileobj.read(JSON_READ_SIZE)
+        if not data:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+def _iter_json_array(fileobj) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the objects of a top-level JSON array without loading the whole
+    document: each element is decoded as soon as it is complete.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    chunks = _text_chunks(fileobj)
+    exhausted = False
+
+    while True:
+        # skip whitespace and separators
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise FlashcardImportError("JSON import must be an array of cards.")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        try:
+            if pos >= len(buffer):
+                raise ValueError
+            item, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            if exhausted:
+                raise FlashcardImportError("Invalid JSON in import file.")
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                buffer = buffer[pos:] + chunk
+                pos = 0
+            continue
+
+        if not isinstance(item, dict):
+            raise FlashcardImportError("Every JSON card must be an object.")
+        yield item
+        pos = end
+
+
+def _iter_json_lines(fileobj) -> Iterator[Dict[str, Any]]:
+    lines = codecs.getreader(_encoding(fileobj))(fileobj)
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            raise FlashcardImportError(f"Invalid JSON on line {line_number}.")
+        if not isinstance(item, dict):
+            raise FlashcardImportError(f"Line {line_number} is not a JSON object.")
+        yield item
+
+
+def _iter_csv(fileobj) -> Iterator[Dict[str, Any]]:
+    reader = csv.DictReader(codecs.getreader(_encoding(fileobj))(fileobj))
+    if not reader.fieldnames or not {"question", "answer"} <= set(reader.fieldnames):
+        raise FlashcardImportError("CSV needs a header with question and answer columns.")
+    yield from reader
+
+
+def iter_rows(fileobj, file_format: str) -> Iterator[Dict[str, Any]]:
+    if file_format == "csv":
+        rows = _iter_csv(fileobj)
+    elif file_format == "jsonl":
+        rows = _iter_json_lines(fileobj)
+    else:
+        rows = _iter_json_array(fileobj)
+
+    try:
+        yield from rows
+    except UnicodeDecodeError:
+        raise FlashcardImportError("Import file must be UTF-8 or UTF-16 text.")
+    except csv.Error as e:
+        raise FlashcardImportError(f"Invalid CSV: {e}")
+
+
+def import_flashcards(
+    rows: Iterable[Dict[str, Any]], topic=None, batch_size: int | None = None
+) -> Dict[str, int]:
+    """
+    Insert cards from `rows` in batches. Rows without a question or answer
+    are skipped; a topic or tag too long for its column fails the import.
+    Returns {"imported", "skipped"}.
+    """
+    if batch_size is None:
+        batch_size = FLASHCARD_IMPORT_BATCH_SIZE
+
+    imported = skipped = 0
+    batch: List[Flashcard] = []
+    with transaction.atomic():
+        for row_number, row in enumerate(rows, start=1):
+            card = _build_card(topic, row, row_number)
+            if card is None:
+                skipped += 1
+                continue
+            batch.append(card)
+            if len(batch) >= batch_size:
+                Flashcard.objects.bulk_create(batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            Flashcard.objects.bulk_create(batch)
+            imported += len(batch)
+
+    return {"imported": imported, "skipped": skipped}
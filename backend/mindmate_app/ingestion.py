@@ -0,0 +1,301 @@
+# mindmate_app/ingestion.py
+"""
+Database-backed ingestion queue for uploaded study documents.
+
+Uploads only enqueue an IngestionJob. A worker loop claims queued jobs
+and runs extract → chunk → embed → persist, writing progress back to the
+job row so the frontend can poll /api/documents/<id>/status/.
+
+The worker reads the upload from MEDIA_ROOT and writes the vector store
+under mindmate_vector_store/, so it must share a disk with the web
+process. By default each gunicorn worker runs the loop in a background
+thread (see gunicorn.conf.py); `python manage.py run_ingestion_worker`
+runs it as its own process for hosts where that disk is shared.
+
+Running jobs refresh `heartbeat_at` with every progress update. A job
+whose worker died (deploy restart, OOM on a big PDF) stops beating; after
+STALE_JOB_SECONDS the next claim puts it back in the queue, or fails it
+once it has used up MAX_JOB_ATTEMPTS.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Iterator, Tuple
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import ai
+from .models import IngestionJob, StudyDocument
+
+# Largest accepted upload per content type, in MB
+MAX_UPLOAD_MB = {
+    "application/pdf": int(os.getenv("MINDMATE_MAX_PDF_UPLOAD_MB", "100")),
+    "text/plain": int(os.getenv("MINDMATE_MAX_TEXT_UPLOAD_MB", "50")),
+}
+
+# A running job with no progress for this long is presumed dead
+STALE_JOB_SECONDS = int(os.getenv("MINDMATE_INGESTION_STALE_SECONDS", "600"))
+MAX_JOB_ATTEMPTS = int(os.getenv("MINDMATE_INGESTION_MAX_ATTEMPTS", "3"))
+
+# Run the worker loop inside each web process (0 when a separate
+# run_ingestion_worker process shares the web process's disk)
+WORKER_IN_WEB = os.getenv("MINDMATE_INGESTION_IN_WEB", "1") == "1"
+POLL_INTERVAL_SECONDS = float(os.getenv("MINDMATE_INGESTION_POLL_SECONDS", "2"))
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionError(Exception):
+    """
+    Raised while reading pages, so run_job can tell extraction failures
+    apart from indexing failures once the two are interleaved.
+    """
+
+
+class UploadLimitHandler(FileUploadHandler):
+    """
+    Stops a multipart upload as soon as a file passes the limit for its
+    content type, before the rest is written to disk. The view checks
+    `exceeded` after parsing and answers 413.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.exceeded: str | None = None
+        self._limit = 0
+        self._received = 0
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._limit = max_upload_bytes(self.content_type)
+        self._received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self._received += len(raw_data)
+        if self._received > self._limit:
+            self.exceeded = self.content_type
+            raise StopUpload(connection_reset=False)
+        return raw_data  # pass through to the handler that stores the file
+
+    def file_complete(self, file_size):
+        return None
+
+
+def max_upload_bytes(content_type: str | None = None) -> int:
+    """
+    Size limit for `content_type`, or the largest limit of any type.
+    """
+    mb = MAX_UPLOAD_MB.get(content_type) if content_type else None
+    return (mb if mb is not None else max(MAX_UPLOAD_MB.values())) * 1024 * 1024
+
+
+def hash_upload(upload_file) -> str:
+    """
+    sha256 of an uploaded file, read in chunks so large files stay off the heap.
+    """
+    digest = hashlib.sha256()
+    for chunk in upload_file.chunks():
+        digest.update(chunk)
+    upload_file.seek(0)
+    return digest.hexdigest()
+
+
+def latest_job(study_doc: StudyDocument) -> IngestionJob | None:
+    return study_doc.ingestion_jobs.order_by("-created_at").first()
+
+
+def _stale_running_jobs():
+    cutoff = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    return IngestionJob.objects.filter(status=IngestionJob.STATUS_RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff)
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+
+def is_retryable(job: IngestionJob) -> bool:
+    """
+    Whether a new upload of the same file should queue a fresh job:
+    the last one failed, or its worker stopped reporting progress.
+    """
+    if job.status == IngestionJob.STATUS_FAILED:
+        return True
+    return _stale_running_jobs().filter(pk=job.pk).exists()
+
+
+def enqueue_document(study_doc: StudyDocument, content_type: str) -> IngestionJob:
+    """
+    Create a queued ingestion job for a freshly saved document, failing
+    any of its earlier jobs whose worker has died.
+    """
+    _stale_running_jobs().filter(document=study_doc).update(
+        status=IngestionJob.STATUS_FAILED,
+        error="The ingestion worker stopped responding.",
+        finished_at=timezone.now(),
+    )
+    return IngestionJob.objects.create(document=study_doc, content_type=content_type)
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Put running jobs whose worker died back in the queue, or fail them
+    after MAX_JOB_ATTEMPTS. Returns how many jobs were touched.
+    """
+    stale = _stale_running_jobs()
+    now = timezone.now()
+    failed = stale.filter(attempts__gte=MAX_JOB_ATTEMPTS).update(
+        status=IngestionJob.STATUS_FAILED,
+        error="The ingestion worker stopped responding.",
+        finished_at=now,
+    )
+    requeued = stale.update(status=IngestionJob.STATUS_QUEUED, heartbeat_at=None)
+    return failed + requeued
+
+
+def claim_next_job() -> IngestionJob | None:
+    """
+    Atomically move the oldest queued job to "running" and return it.
+    The conditional UPDATE makes this safe with several workers,
+    even on SQLite (no SELECT ... FOR UPDATE needed).
+    """
+    requeue_stale_jobs()
+
+    candidates = IngestionJob.objects.filter(
+        status=IngestionJob.STATUS_QUEUED
+    ).values_list("pk", flat=True)[:10]
+
+    for pk in candidates:
+        now = timezone.now()
+        claimed = IngestionJob.objects.filter(
+            pk=pk, status=IngestionJob.STATUS_QUEUED
+        ).update(
+            status=IngestionJob.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return IngestionJob.objects.select_related("document").get(pk=pk)
+    return None
+
+
+def _update_progress(job: IngestionJob, **fields) -> None:
+    IngestionJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now(), **fields)
+
+
+def _finish(job: IngestionJob, status: str, error: str = "") -> None:
+    _update_progress(job, status=status, error=error, finished_at=timezone.now())
+
+
+def extract_pages(job: IngestionJob) -> Iterator[Tuple[int | None, str]]:
+    """
+    Lazily yield (page_number, text) for a job; text is read as the indexer
+    consumes it. Plain-text files come in fixed-size blocks with no page
+    number.
+    """
+    file_path = job.document.file.path
+    try:
+        if job.content_type == "application/pdf":
+            yield from ai.iter_pdf_pages(
+                file_path,
+                progress_callback=lambda parsed, total: _update_progress(
+                    job, pages_parsed=parsed, pages_total=total
+                ),
+            )
+        elif job.content_type == "text/plain":
+            for block in ai.iter_text_blocks(file_path):
+                yield None, block
+        else:
+            raise ValueError(f"Unsupported file type: {job.content_type}")
+    except Exception as e:
+        raise ExtractionError(str(e)) from e
+
+
+def run_job(job: IngestionJob) -> None:
+    """
+    Run one claimed job to completion, recording success or failure on the row.
+    """
+    study_doc = job.document
+
+    try:
+        # text streams straight into the splitter; never read whole
+        num_chunks = ai.index_pages(
+            extract_pages(job),
+            title=study_doc.title or study_doc.file.name,
+            source=f"document:{study_doc.id}",
+            user_id=study_doc.user_id,
+            progress_callback=lambda embedded, total: _update_progress(
+                job, chunks_embedded=embedded, chunks_total=total
+            ),
+        )
+    except ExtractionError as e:
+        _finish(job, IngestionJob.STATUS_FAILED, f"Failed to extract text: {e}")
+        return
+    except Exception as e:
+        _finish(job, IngestionJob.STATUS_FAILED, f"Failed to index document: {e}")
+        return
+
+    if not num_chunks:
+        _finish(
+            job,
+            IngestionJob.STATUS_FAILED,
+            "No extractable text found in the document.",
+        )
+        return
+
+    _finish(job, IngestionJob.STATUS_DONE)
+
+
+def run_worker(
+    poll_interval: float = POLL_INTERVAL_SECONDS, once: bool = False, log=None
+) -> None:
+    """
+    Claim and run queued jobs until the queue is empty (`once`) or forever.
+    `log` is called with a progress line for each job.
+    """
+    while True:
+        # drop connections the database closed while we slept or worked
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        if log:
+            log(f"Processing job {job.id} (document {job.document_id})")
+        run_job(job)
+        job.refresh_from_db()
+        if log:
+            log(f"Job {job.id} {job.status}: {job.chunks_embedded} chunks embedded")
+
+
+def _run_worker_forever(poll_interval: float) -> None:
+    while True:
+        try:
+            run_worker(poll_interval, log=logger.info)
+        except Exception:
+            # a database hiccup must not stop ingestion for the process's lifetime
+            logger.exception("Ingestion worker loop crashed; restarting")
+            time.sleep(poll_interval)
+
+
+def start_worker_thread(poll_interval: float = POLL_INTERVAL_SECONDS) -> threading.Thread:
+    """
+    Run the worker loop in a daemon thread of the current (web) process.
+    Several processes doing this is safe: claim_next_job is atomic.
+    """
+    thread = threading.Thread(
+        target=_run_worker_forever,
+        args=(poll_interval,),
+        name="mindmate-ingestion",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,233 @@
+# mindmate_app/llm.py
+"""
+Single gateway for every LLM call in MindMate.
+
+- one pooled, keep-alive HTTP client per event loop
+- per-call timeouts
+- bounded retries with exponential backoff and full jitter
+- a concurrency limiter so a traffic spike can't open unbounded requests
+- a deterministic local "stub" backend (MINDMATE_LLM_BACKEND=stub) so every
+  path can be exercised and load-tested offline
+
+Clients are created on first use, so importing this module never needs an
+API key.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import weakref
+from typing import AsyncIterator, Dict, List
+
+import httpx
+from dotenv import load_dotenv
+from groq import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncGroq,
+)
+
+load_dotenv()
+
+LLM_BACKEND = os.getenv("MINDMATE_LLM_BACKEND", "groq")  # "groq" or "stub"
+LLM_TIMEOUT_SECONDS = float(os.getenv("MINDMATE_LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("MINDMATE_LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("MINDMATE_LLM_MAX_CONCURRENCY", "64"))
+LLM_POOL_SIZE = int(os.getenv("MINDMATE_LLM_POOL_SIZE", "100"))
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("MINDMATE_LLM_STUB_LATENCY", "0"))
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# Backoff: base * 2**attempt, capped, with full jitter
+RETRY_BASE_SECONDS = 0.5
+RETRY_MAX_SECONDS = 8.0
+
+
+class LLMError(Exception):
+    """Raised when the LLM can't be reached or keeps failing."""
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(e, APIStatusError):
+        return e.status_code == 429 or e.status_code >= 500
+    return False
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2**attempt))
+
+
+def _api_key() -> str:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise LLMError("GROQ_API_KEY is not set.")
+    return api_key
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_SIZE,
+        max_keepalive_connections=LLM_POOL_SIZE,
+        keepalive_expiry=60,
+    )
+
+
+# ---------- clients ----------
+
+# httpx async pools and asyncio semaphores belong to one event loop, so
+# keep one of each per loop (normally just the server's loop).
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> AsyncGroq:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncGroq(
+            api_key=_api_key(),
+            max_retries=0,
+            timeout=LLM_TIMEOUT_SECONDS,
+            http_client=httpx.AsyncClient(limits=_limits()),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def _async_limiter() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limiter = _async_limiters.get(loop)
+    if limiter is None:
+        limiter = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _async_limiters[loop] = limiter
+    return limiter
+
+
+# ---------- stub backend ----------
+
+def stub_reply(messages: List[Dict[str, str]], model: str) -> str:
+    """
+    Deterministic offline answer. Prompts that ask for JSON get JSON that
+    every MindMate parser accepts, sized from the requested count.
+    """
+    prompt = "\n".join(m.get("content", "") for m in messages)
+    digest = hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()[:12]
+    last = messages[-1].get("content", "").strip() if messages else ""
+
+    if "JSON" not in prompt:
+        return f"[stub {digest}] {last[:200]}"
+
+    num_cards = re.search(r"Create (\d+) flashcards", prompt)
+    num_questions = re.search(r"Number of questions to generate: (\d+)", prompt)
+    return json.dumps(
+        {
+            "summary": f"[stub {digest}] summary",
+            "key_points": [f"[stub {digest}] point {i}" for i in range(3)],
+            "cards": [
+                {
+                    "question": f"[stub {digest}] question {i}",
+                    "answer": f"[stub {digest}] answer {i}",
+                    "tag": "stub",
+                }
+                for i in range(int(num_cards.group(1)) if num_cards else 3)
+            ],
+            "topic": "stub",
+            "questions": [
+                {
+                    "question": f"[stub {digest}] question {i}",
+                    "options": ["A", "B", "C", "D"],
+                    "correct_index": 0,
+                    "explanation": "stub",
+                }
+                for i in range(int(num_questions.group(1)) if num_questions else 0)
+            ],
+        }
+    )
+
+
+def _stub_tokens(text: str) -> List[str]:
+    words = text.split(" ")
+    return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+
+# ---------- public API ----------
+
+async def achat(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.3,
+    timeout: float | None = None,
+) -> str:
+    """
+    Run a chat completion and return the reply text.
+    """
+    if LLM_BACKEND == "stub":
+        await asyncio.sleep(LLM_STUB_LATENCY_SECONDS)
+        return stub_reply(messages, model)
+
+    client = get_async_client()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            async with _async_limiter():
+                completion = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=timeout or LLM_TIMEOUT_SECONDS,
+                )
+            return completion.choices[0].message.content
+        except Exception as e:
+            if not _is_retryable(e) or attempt == LLM_MAX_RETRIES:
+                raise LLMError(f"LLM call failed: {e}") from e
+            await asyncio.sleep(_backoff(attempt))
+
+
+async def astream_chat(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.3,
+    timeout: float | None = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion, yielding text deltas. Failures are retried
+    only until the first delta has been sent.
+    """
+    if LLM_BACKEND == "stub":
+        await asyncio.sleep(LLM_STUB_LATENCY_SECONDS)
+        for token in _stub_tokens(stub_reply(messages, model)):
+            yield token
+        return
+
+    client = get_async_client()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        started = False
+        try:
+            async with _async_limiter():
+                stream = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=timeout or LLM_TIMEOUT_SECONDS,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        started = True
+                        yield delta
+            return
+        except Exception as e:
+            if started or not _is_retryable(e) or attempt == LLM_MAX_RETRIES:
+                raise LLMError(f"LLM stream failed: {e}") from e
+            await asyncio.sleep(_backoff(attempt))
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from mindmate_app import ai
+from mindmate_app.ingestion import enqueue_document, latest_job
+from mindmate_app.models import StudyDocument
+
+
+def guess_content_type(study_doc: StudyDocument) -> str:
+    job = latest_job(study_doc)
+    if job is not None:
+        return job.content_type
+    if study_doc.file.name.lower().endswith(".pdf"):
+        return "application/pdf"
+    return "text/plain"
+
+
+class Command(BaseCommand):
+    help = (
+        "Give documents uploaded before per-user knowledge bases an owner and "
+        "re-index them into that user's collection. Without --user, lists the "
+        "documents that have no owner."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Username (or id) of the owner to assign.",
+        )
+        parser.add_argument(
+            "--document",
+            type=int,
+            nargs="+",
+            help="Only these document ids (default: every document without an owner).",
+        )
+
+    def handle(self, *args, **options):
+        documents = StudyDocument.objects.filter(user__isnull=True).order_by("pk")
+        if options["document"]:
+            documents = documents.filter(pk__in=options["document"])
+
+        if not options["user"]:
+            for study_doc in documents:
+                self.stdout.write(f"{study_doc.pk}\t{study_doc.uploaded_at:%Y-%m-%d}\t{study_doc}")
+            self.stdout.write(f"{len(documents)} documents without an owner.")
+            return
+
+        User = get_user_model()
+        lookup = options["user"]
+        user = User.objects.filter(username=lookup).first()
+        if user is None and lookup.isdigit():
+            user = User.objects.filter(pk=int(lookup)).first()
+        if user is None:
+            raise CommandError(f"No user {lookup!r}.")
+
+        assigned = 0
+        for study_doc in documents:
+            study_doc.user = user
+            study_doc.save(update_fields=["user"])
+            # the ingestion worker indexes it into the owner's collection;
+            # the copy in the shared collection goes now
+            enqueue_document(study_doc, guess_content_type(study_doc))
+            removed = ai.delete_document_chunks(f"document:{study_doc.pk}", user_id=None)
+            self.stdout.write(
+                f"Document {study_doc.pk} → {user.username} "
+                f"({removed} shared chunks removed, re-index queued)"
+            )
+            assigned += 1
+
+        self.stdout.write(f"Assigned {assigned} documents to {user.username}.")
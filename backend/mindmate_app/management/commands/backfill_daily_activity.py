@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from mindmate_app.rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the task and habit columns of the daily analytics rollup."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only rebuild the rollup of this user id.",
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options["user"] is not None:
+            users = get_user_model().objects.filter(pk=options["user"])
+
+        written = backfill_rollups(users)
+        self.stdout.write(f"Wrote {written} daily activity rows.")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from mindmate_app.models import Habit
+from mindmate_app.streaks import rebuild_streaks
+
+
+class Command(BaseCommand):
+    help = "Recompute every habit's stored streak counters from its completions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only rebuild the habits of this user id.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Habits updated per bulk UPDATE.",
+        )
+
+    def handle(self, *args, **options):
+        habits = Habit.objects.all()
+        if options["user"] is not None:
+            habits = habits.filter(user_id=options["user"])
+
+        updated = rebuild_streaks(habits, batch_size=options["batch_size"])
+        self.stdout.write(f"Rebuilt streaks for {updated} habits.")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mindmate_app.rag.embedding_server import serve
+from mindmate_app.rag.vector_store import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_SOCKET,
+    load_embedding_model,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the embedding model over a Unix socket. Web processes started "
+        "with MINDMATE_EMBEDDING_SOCKET=<path> use it instead of loading the model."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=EMBEDDING_SOCKET or "/tmp/mindmate-embed.sock",
+            help="Socket path (default: $MINDMATE_EMBEDDING_SOCKET).",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        model = load_embedding_model()
+        self.stdout.write(
+            f"Loaded {EMBEDDING_MODEL_NAME} in {time.perf_counter() - start:.1f}s, "
+            f"serving on {options['socket']}"
+        )
+        serve(options["socket"], model)
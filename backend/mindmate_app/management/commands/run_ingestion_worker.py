@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from mindmate_app.ingestion import POLL_INTERVAL_SECONDS, run_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued document ingestion jobs (extract, chunk, embed, persist). "
+        "Must share MEDIA_ROOT and mindmate_vector_store/ with the web process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit instead of polling forever.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=POLL_INTERVAL_SECONDS,
+            help="Seconds to sleep when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Ingestion worker started.")
+        run_worker(
+            options["poll_interval"],
+            once=options["once"],
+            log=self.stdout.write,
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-17 04:34
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def fill_streaks(apps, schema_editor):
+    Habit = apps.get_model("mindmate_app", "Habit")
+    HabitCompletion = apps.get_model("mindmate_app", "HabitCompletion")
+
+    dates_by_habit = {}
+    for habit_id, day in (
+        HabitCompletion.objects.filter(completed=True)
+        .order_by("habit_id", "date")
+        .values_list("habit_id", "date")
+    ):
+        dates_by_habit.setdefault(habit_id, []).append(day)
+
+    habits = list(Habit.objects.filter(pk__in=dates_by_habit))
+    for habit in habits:
+        current = longest = 0
+        last = None
+        for day in dates_by_habit[habit.pk]:
+            current = current + 1 if last is not None and day == last + timedelta(days=1) else 1
+            longest = max(longest, current)
+            last = day
+        habit.current_streak = current
+        habit.longest_streak = longest
+        habit.last_completed_date = last
+    Habit.objects.bulk_update(
+        habits, ["current_streak", "longest_streak", "last_completed_date"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindmate_app', '0007_studydocument_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habit',
+            name='current_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='last_completed_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='longest_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 6.0 on 2026-10-17 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_daily_activity(apps, schema_editor):
+    DailyActivity = apps.get_model("mindmate_app", "DailyActivity")
+    StudyTask = apps.get_model("mindmate_app", "StudyTask")
+    HabitCompletion = apps.get_model("mindmate_app", "HabitCompletion")
+
+    rows = {}
+    for r in StudyTask.objects.values("user_id", "date").annotate(
+        total=Count("id"), done=Count("id", filter=Q(done=True))
+    ):
+        rows.setdefault((r["user_id"], r["date"]), {}).update(
+            tasks_total=r["total"], tasks_done=r["done"]
+        )
+    for r in (
+        HabitCompletion.objects.filter(completed=True, habit__is_active=True)
+        .values("habit__user_id", "date")
+        .annotate(n=Count("id"))
+    ):
+        rows.setdefault((r["habit__user_id"], r["date"]), {})["habits_completed"] = r["n"]
+
+    DailyActivity.objects.bulk_create(
+        [DailyActivity(user_id=user_id, date=day, **values) for (user_id, day), values in rows.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mindmate_app', '0008_habit_streaks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('tasks_total', models.IntegerField(default=0)),
+                ('tasks_done', models.IntegerField(default=0)),
+                ('habits_completed', models.IntegerField(default=0)),
+                ('focus_minutes', models.IntegerField(default=0)),
+                ('sessions', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_daily_activity, migrations.RunPython.noop),
+    ]
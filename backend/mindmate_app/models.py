@@ -13,6 +13,13 @@ class Flashcard(models.Model):
         return self.question[:50]
 
 class StudyDocument(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="study_documents",
+        blank=True,
+        null=True,
+    )
     title = models.CharField(max_length=255, blank=True, null=True)
     file = models.FileField(upload_to="documents/")
     source = models.CharField(
@@ -20,6 +27,8 @@ class StudyDocument(models.Model):
         default="user-upload",
         help_text="Where this document came from (e.g., 'upload').",
     )
+    # sha256 of the uploaded file, used to skip re-uploads of identical files
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -87,6 +96,11 @@ class Habit(models.Model):
     target_per_day = models.PositiveSmallIntegerField(default=1)
     reminder_time = models.TimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # denormalized from completions (see mindmate_app/streaks.py):
+    # current_streak is the run of completed days ending at last_completed_date
+    current_streak = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_completed_date = models.DateField(blank=True, null=True)
 
     def __str__(self):
         return f"{self.user.username} – {self.title}"
@@ -109,3 +123,70 @@ class HabitCompletion(models.Model):
 
     def __str__(self):
         return f"{self.habit.title} on {self.date}: {self.count} / {self.habit.target_per_day}"
+
+class IngestionJob(models.Model):
+    """Background extract → chunk → embed → persist job for an uploaded document."""
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    document = models.ForeignKey(
+        StudyDocument,
+        on_delete=models.CASCADE,
+        related_name="ingestion_jobs",
+    )
+    content_type = models.CharField(max_length=100)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True
+    )
+    # progress counters, updated by the worker as it goes
+    pages_total = models.PositiveIntegerField(default=0)
+    pages_parsed = models.PositiveIntegerField(default=0)
+    chunks_total = models.PositiveIntegerField(default=0)
+    chunks_embedded = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # times claimed by a worker; a job whose worker dies is retried a few times
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # refreshed on every progress update while running
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"Job {self.id} for document {self.document_id}: {self.status}"
+
+class DailyActivity(models.Model):
+    """
+    Per-user, per-day analytics rollup, kept up to date by the planner,
+    habit and pomodoro endpoints (see mindmate_app/rollups.py).
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_activity",
+    )
+    date = models.DateField()
+    # planner tasks scheduled on this date, and how many of them are done
+    tasks_total = models.IntegerField(default=0)
+    tasks_done = models.IntegerField(default=0)
+    # completions of active habits on this date
+    habits_completed = models.IntegerField(default=0)
+    focus_minutes = models.IntegerField(default=0)
+    sessions = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "date")
+
+    def __str__(self):
+        return f"{self.user.username} on {self.date}"
@@ -0,0 +1,208 @@
+# mindmate_app/rag/backends.py
+"""
+Search backends behind MindMateVectorStore.search.
+
+Chroma is always the store of record. For small collections the store also
+keeps an exact NumPy index on disk (normalised float32 vectors, memory-mapped
+on read), which answers top-k with one matrix-vector product instead of a
+round trip through Chroma's SQLite + HNSW layers.
+"""
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Collections up to this many vectors are searched with NumpyBackend
+NUMPY_BACKEND_MAX_VECTORS = int(os.getenv("MINDMATE_NUMPY_BACKEND_MAX_VECTORS", "20000"))
+# Rows fetched per Chroma page when exporting a collection
+EXPORT_PAGE_SIZE = 5000
+
+
+class SearchBackend:
+    """
+    Minimal interface every search engine implements.
+    """
+
+    name = "base"
+
+    def search(self, query_vector: List[float], k: int) -> List[Dict[str, Any]]:
+        """
+        Return up to k results as {"content", "metadata", "score"} dicts,
+        best first.
+        """
+        raise NotImplementedError
+
+
+class ChromaBackend(SearchBackend):
+    """
+    Approximate (HNSW) search through the LangChain Chroma wrapper.
+    """
+
+    name = "chroma"
+
+    def __init__(self, db):
+        self.db = db
+
+    def search(self, query_vector: List[float], k: int) -> List[Dict[str, Any]]:
+        docs_and_distances = self.db.similarity_search_by_vector_with_relevance_scores(
+            query_vector, k=k
+        )
+        # Collections use squared L2 on normalised vectors: d = 2 - 2cos.
+        # Report cosine similarity so scores match NumpyBackend.
+        return [
+            {
+                "content": d.page_content,
+                "metadata": d.metadata,
+                "score": 1.0 - float(distance) / 2.0,
+            }
+            for d, distance in docs_and_distances
+        ]
+
+
+class NumpyBackend(SearchBackend):
+    """
+    Exact brute-force cosine search over a contiguous float32 matrix.
+
+    On disk a collection is two files in `directory`:
+      - vectors-<id>.npy: (n, dim) L2-normalised float32 matrix
+      - index.json: ids, documents, metadatas and the name of the .npy file
+
+    Writers create a new .npy and then atomically replace index.json, so a
+    reader always sees a consistent pair. Readers reload when index.json's
+    mtime changes, which also picks up writes made by other processes.
+    """
+
+    name = "numpy"
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.index_path = self.directory / "index.json"
+        self._loaded_mtime: float | None = None
+        self._vectors: np.ndarray | None = None
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+
+    def available(self) -> bool:
+        return self.index_path.exists()
+
+    def _load_if_changed(self) -> None:
+        # A concurrent writer may replace the matrix between reading
+        # index.json and opening it; re-reading once picks up the new pair.
+        for attempt in range(2):
+            mtime = self.index_path.stat().st_mtime
+            if mtime == self._loaded_mtime:
+                return
+
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            try:
+                vectors = np.load(self.directory / index["vectors_file"], mmap_mode="r")
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                continue
+
+            self._vectors = vectors
+            self._documents = index["documents"]
+            self._metadatas = index["metadatas"]
+            self._loaded_mtime = mtime
+            return
+
+    def search(self, query_vector: List[float], k: int) -> List[Dict[str, Any]]:
+        self._load_if_changed()
+        n = len(self._documents)
+        if n == 0 or k <= 0:
+            return []
+
+        q = np.asarray(query_vector, dtype=np.float32)
+        q /= np.linalg.norm(q) or 1.0
+        scores = self._vectors @ q
+
+        if k < n:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "content": self._documents[i],
+                "metadata": self._metadatas[i],
+                "score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+    def write(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Replace the index contents.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(matrix):
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix /= np.where(norms == 0, 1.0, norms)
+
+        vectors_file = f"vectors-{uuid.uuid4().hex}.npy"
+        np.save(self.directory / vectors_file, matrix)
+
+        tmp_path = self.directory / f"index.json.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "vectors_file": vectors_file,
+                    "ids": ids,
+                    "documents": documents,
+                    "metadatas": metadatas,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.index_path)
+
+        # Old matrices can go; open memmaps keep working on Linux
+        for old in self.directory.glob("vectors-*.npy"):
+            if old.name != vectors_file:
+                old.unlink(missing_ok=True)
+
+    def export_from(self, collection) -> None:
+        """
+        Rebuild the index from everything stored in a Chroma collection.
+        """
+        ids: List[str] = []
+        documents: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        vectors: List[np.ndarray] = []
+
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=EXPORT_PAGE_SIZE,
+                offset=offset,
+            )
+            if not page["ids"]:
+                break
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+            vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+            offset += len(page["ids"])
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        self.write(ids, matrix, documents, metadatas)
+
+    def remove(self) -> None:
+        self.index_path.unlink(missing_ok=True)
+        for old in self.directory.glob("vectors-*.npy"):
+            old.unlink(missing_ok=True)
+        self._loaded_mtime = None
@@ -0,0 +1,208 @@
+# mindmate_app/rag/context_packing.py
+"""
+Fit retrieved chunks into a per-model token budget before they go into a
+prompt.
+
+Steps:
+  1. drop near-duplicate chunks (same text up to case/whitespace, or
+     almost the same words), keeping the best-scored copy
+  2. take chunks best score first while the packed context still fits
+  3. merge chunks that are neighbours on the same page of the same
+     document, removing the overlap the splitter added between them, and
+     order the passages by their best chunk
+
+Token counts are estimated at ~4 characters per token, which is close
+enough for the Llama tokenizers and needs no extra dependency.
+"""
+import math
+import os
+import re
+from typing import Any, Dict, List
+
+# Context budget (tokens) per model; anything else gets the default
+CONTEXT_TOKEN_BUDGETS: Dict[str, int] = {
+    "llama-3.3-70b-versatile": 6000,
+    "llama-3.1-8b-instant": 3000,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = int(os.getenv("MINDMATE_CONTEXT_TOKEN_BUDGET", "4000"))
+
+# e.g. MINDMATE_CONTEXT_TOKEN_BUDGETS="llama-3.1-8b-instant=2000,other-model=8000"
+for _item in os.getenv("MINDMATE_CONTEXT_TOKEN_BUDGETS", "").split(","):
+    if "=" in _item:
+        _model, _budget = _item.split("=", 1)
+        CONTEXT_TOKEN_BUDGETS[_model.strip()] = int(_budget)
+
+CHARS_PER_TOKEN = 4
+# Word-set Jaccard similarity above which two chunks count as duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.9
+# Longest suffix/prefix checked when merging neighbours (splitter overlap is 100)
+MAX_MERGE_OVERLAP = 200
+# Shorter matches are coincidence, e.g. across a page or text-block
+# boundary, where neighbouring chunks don't overlap at all
+MIN_MERGE_OVERLAP = 20
+SEPARATOR = "\n\n---\n\n"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget_for(model: str | None) -> int:
+    return CONTEXT_TOKEN_BUDGETS.get(model, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+def _header(meta: Dict[str, Any], chunk_ids: List[Any]) -> str:
+    title = meta.get("title", "Unknown document")
+    if meta.get("page") is not None:
+        # merged passages never span pages, so the first chunk's page holds
+        title = f"{title}, Page {meta['page']}"
+    if len(chunk_ids) == 1:
+        return f"[Source: {title}, Chunk {chunk_ids[0]}]"
+    return f"[Source: {title}, Chunks {chunk_ids[0]}-{chunk_ids[-1]}]"
+
+
+def format_passage(content: str, meta: Dict[str, Any], chunk_ids: List[Any]) -> str:
+    return f"{_header(meta, chunk_ids)}\n{content}\n"
+
+
+def _merge_text(left: str, right: str) -> str:
+    """
+    Join two neighbouring chunks, dropping the longest suffix of `left`
+    (at least MIN_MERGE_OVERLAP characters) that `right` starts with.
+    """
+    longest = min(len(left), len(right), MAX_MERGE_OVERLAP)
+    for size in range(longest, MIN_MERGE_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return left + " " + right
+
+
+def _is_near_duplicate(words: set, kept_words: List[set]) -> bool:
+    for other in kept_words:
+        union = len(words | other)
+        if union and len(words & other) / union >= NEAR_DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def _merge_neighbours(ranked: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Collapse runs of consecutive chunks from the same page of a document
+    into one passage. Passages are returned best-ranked first.
+    """
+    by_source: Dict[Any, List[Dict[str, Any]]] = {}
+    passages: List[Dict[str, Any]] = []
+    for rank, c in enumerate(ranked):
+        meta = c.get("metadata", {})
+        chunk_id = meta.get("chunk_id")
+        source = meta.get("source", meta.get("title"))
+        if not isinstance(chunk_id, int) or source is None:
+            passages.append(
+                {
+                    "content": c["content"],
+                    "metadata": meta,
+                    "chunk_ids": [rank if chunk_id is None else chunk_id],
+                    "rank": rank,
+                }
+            )
+            continue
+        by_source.setdefault(source, []).append({**c, "rank": rank})
+
+    for group in by_source.values():
+        group.sort(key=lambda c: c["metadata"]["chunk_id"])
+        current = None
+        for c in group:
+            chunk_id = c["metadata"]["chunk_id"]
+            if (
+                current is not None
+                and chunk_id == current["chunk_ids"][-1] + 1
+                and c["metadata"].get("page") == current["metadata"].get("page")
+            ):
+                current["content"] = _merge_text(current["content"], c["content"])
+                current["chunk_ids"].append(chunk_id)
+                current["rank"] = min(current["rank"], c["rank"])
+                continue
+            current = {
+                "content": c["content"],
+                "metadata": c["metadata"],
+                "chunk_ids": [chunk_id],
+                "rank": c["rank"],
+            }
+            passages.append(current)
+
+    passages.sort(key=lambda p: p["rank"])
+    return passages
+
+
+def _render(passages: List[Dict[str, Any]]) -> str:
+    return SEPARATOR.join(
+        format_passage(p["content"], p["metadata"], p["chunk_ids"]) for p in passages
+    )
+
+
+def pack_chunks(chunks: List[Dict[str, Any]], token_budget: int) -> Dict[str, Any]:
+    """
+    Return {"text", "passages", "tokens", "tokens_before", "tokens_saved",
+    "chunks_in", "chunks_used"} for the given search results.
+
+    Results without a "score" keep their retrieval order.
+    """
+    # what an unpacked prompt would have contained, for the savings report
+    raw_text = SEPARATOR.join(
+        format_passage(
+            c["content"],
+            c.get("metadata", {}),
+            [c.get("metadata", {}).get("chunk_id", i)],
+        )
+        for i, c in enumerate(chunks)
+    )
+
+    ranked = [
+        c
+        for _, c in sorted(
+            enumerate(chunks),
+            key=lambda item: (-item[1].get("score", 0.0), item[0]),
+        )
+    ]
+
+    # 1. near-duplicates
+    unique: List[Dict[str, Any]] = []
+    seen_texts = set()
+    kept_words: List[set] = []
+    for c in ranked:
+        normalized = " ".join(c["content"].lower().split())
+        words = set(_WORD_RE.findall(normalized))
+        if normalized in seen_texts or _is_near_duplicate(words, kept_words):
+            continue
+        seen_texts.add(normalized)
+        kept_words.append(words)
+        unique.append(c)
+
+    # 2 + 3. take chunks best first while the merged result still fits
+    selected: List[Dict[str, Any]] = []
+    passages: List[Dict[str, Any]] = []
+    for c in unique:
+        candidate = _merge_neighbours(selected + [c])
+        if estimate_tokens(_render(candidate)) <= token_budget:
+            selected.append(c)
+            passages = candidate
+
+    packed_text = _render(passages)
+    if not passages and unique:
+        # Not even the best chunk fits: send as much of it as allowed
+        passages = _merge_neighbours(unique[:1])
+        packed_text = _render(passages)[: token_budget * CHARS_PER_TOKEN]
+
+    tokens_before = estimate_tokens(raw_text)
+    tokens_after = estimate_tokens(packed_text)
+    return {
+        "text": packed_text,
+        "passages": passages,
+        "tokens": tokens_after,
+        "tokens_before": tokens_before,
+        "tokens_saved": max(0, tokens_before - tokens_after),
+        "chunks_in": len(chunks),
+        "chunks_used": sum(len(p["chunk_ids"]) for p in passages),
+    }
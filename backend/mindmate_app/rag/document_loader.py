@@ -1,23 +1,133 @@
 # mindmate_app/rag/document_loader.py
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List, Tuple
 from pypdf import PdfReader
 
+# MINDMATE_PDF_WORKERS=0 means "one worker per CPU core"; 1 parses in-process.
+PDF_WORKERS = int(os.getenv("MINDMATE_PDF_WORKERS", "1"))
+# Pages extracted per task. Each task opens its own PdfReader, so objects
+# pypdf caches while parsing are dropped after every range.
+PDF_PAGES_PER_TASK = int(os.getenv("MINDMATE_PDF_PAGES_PER_TASK", "16"))
+# Characters read at a time from plain-text files
+TEXT_BLOCK_CHARS = int(os.getenv("MINDMATE_TEXT_BLOCK_CHARS", str(64 * 1024)))
+# Where a text block may end, best first
+TEXT_BLOCK_BREAKS = ("\n\n", "\n", " ")
 
-def load_pdf_text(file_path: str) -> str:
+
+def _extract_range(file_path: str, start: int, stop: int) -> List[str]:
     """
-    Read a PDF file from disk and return its full text.
+    Text of pages [start, stop) (0-based), read with a fresh reader.
+    """
+    # Given a path, pypdf reads the whole file into memory; given an open
+    # file it seeks to the objects it needs.
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _extract_ranges_parallel(
+    file_path: str, ranges: List[Tuple[int, int]], workers: int
+) -> Iterator[List[str]]:
+    """
+    Extract page ranges in a process pool, yielding results in order with
+    at most workers * 2 ranges in flight.
+    """
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+    pending: deque = deque()
+    todo = iter(ranges)
+    try:
+        for start, stop in todo:
+            pending.append(pool.submit(_extract_range, file_path, start, stop))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            texts = pending.popleft().result()
+            for start, stop in todo:
+                pending.append(pool.submit(_extract_range, file_path, start, stop))
+                break
+            yield texts
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def iter_pdf_pages(
+    file_path: str,
+    progress_callback: Callable[[int, int], None] | None = None,
+    num_workers: int | None = None,
+    pages_per_task: int | None = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily yield (page_number, text) for every page of a PDF, 1-based and
+    in order. Only a few page ranges are held in memory at a time, so long
+    textbooks can be chunked while they are still being parsed.
+
+    With num_workers > 1, ranges are extracted in parallel worker processes.
+    If given, progress_callback(pages_parsed, pages_total) is called after each page.
     """
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"PDF not found: {file_path}")
+    if num_workers is None:
+        num_workers = PDF_WORKERS
+    if num_workers <= 0:
+        num_workers = os.cpu_count() or 1
+    step = max(1, pages_per_task or PDF_PAGES_PER_TASK)
 
-    reader = PdfReader(str(path))
-    text_parts: List[str] = []
+    with open(path, "rb") as f:
+        total_pages = len(PdfReader(f).pages)
+    ranges = [(s, min(s + step, total_pages)) for s in range(0, total_pages, step)]
 
-    for page in reader.pages:
-        page_text = page.extract_text() or ""
-        text_parts.append(page_text)
+    if num_workers == 1 or len(ranges) <= 1:
+        results = (_extract_range(str(path), start, stop) for start, stop in ranges)
+    else:
+        results = _extract_ranges_parallel(str(path), ranges, num_workers)
 
+    for (start, _), texts in zip(ranges, results):
+        for offset, page_text in enumerate(texts):
+            page_num = start + offset + 1
+            if progress_callback is not None:
+                progress_callback(page_num, total_pages)
+            yield page_num, page_text
+
+
+def load_pdf_text(
+    file_path: str,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> str:
+    """
+    Read a PDF file from disk and return its full text.
+    If given, progress_callback(pages_parsed, pages_total) is called after each page.
+    Prefer iter_pdf_pages for large files: this holds the whole text at once.
+    """
+    return "\n\n".join(text for _, text in iter_pdf_pages(file_path, progress_callback))
+
+
+def iter_text_blocks(file_path: str, block_chars: int | None = None) -> Iterator[str]:
+    """
+    Read a UTF-8 text file in fixed-size blocks and yield them, each cut at
+    its last paragraph, line or word break (the rest is carried into the
+    next block). Memory use is bounded by the block size, not the file.
+    """
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Text file not found: {file_path}")
+    block_chars = max(1, block_chars or TEXT_BLOCK_CHARS)
 
-    return "\n\n".join(text_parts)
+    carry = ""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        while data := f.read(block_chars):
+            text = carry + data
+            cut = len(text)
+            for brk in TEXT_BLOCK_BREAKS:
+                pos = text.rfind(brk)
+                if pos > 0:
+                    cut = pos + len(brk)
+                    break
+            carry = text[cut:]
+            yield text[:cut]
+    if carry:
+        yield carry
@@ -0,0 +1,207 @@
+# mindmate_app/rag/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Cap on cached vectors (MiniLM: 384 float32 = 1.5 KB each)
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("MINDMATE_EMBED_CACHE_MAX_ENTRIES", "100000"))
+# Fraction of the cap freed in one go once it is exceeded, so we don't
+# run a DELETE on every insert
+EVICT_FRACTION = 0.1
+# Hits update last_used in memory; the timestamps are written with the
+# next insert, or once this many are pending or the oldest is this old
+RECENCY_FLUSH_ENTRIES = 1000
+RECENCY_FLUSH_SECONDS = 60.0
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of embedding vectors keyed by (model name, text hash).
+
+    Vectors are stored as packed float32 blobs in SQLite. Each hit refreshes
+    the row's last_used timestamp; once the table grows past max_entries the
+    least recently used rows are evicted.
+
+    Hits only record the new timestamp in memory, so a lookup is a plain
+    read and never takes SQLite's write lock. The pending timestamps are
+    written in one executemany with the next put_many (just before it
+    evicts), or when RECENCY_FLUSH_ENTRIES / RECENCY_FLUSH_SECONDS is
+    reached.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int | None = None):
+        if max_entries is None:
+            max_entries = EMBED_CACHE_MAX_ENTRIES
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # (model, text_hash) -> last_used not yet written
+        self._pending_touches: Dict[Tuple[str, str], float] = {}
+        self._pending_since = 0.0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embedding_cache_last_used "
+            "ON embedding_cache (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """
+        Return {text: vector} for every text that is cached.
+        """
+        by_hash = {_text_hash(t): t for t in texts}
+        found: Dict[str, List[float]] = {}
+        hashes = list(by_hash)
+
+        with self._lock:
+            # stay well below SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embedding_cache "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[by_hash[h]] = _unpack(blob)
+
+            if found:
+                now = time.time()
+                if not self._pending_touches:
+                    self._pending_since = now
+                for t in found:
+                    self._pending_touches[(model, _text_hash(t))] = now
+                if (
+                    len(self._pending_touches) >= RECENCY_FLUSH_ENTRIES
+                    or now - self._pending_since >= RECENCY_FLUSH_SECONDS
+                ):
+                    self._flush_touches()
+                    self._conn.commit()
+
+            self.hits += sum(1 for t in texts if t in found)
+            self.misses += sum(1 for t in texts if t not in found)
+
+        return found
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache "
+                "(model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (model, _text_hash(t), _pack(v), now)
+                    for t, v in zip(texts, vectors)
+                ],
+            )
+            self._flush_touches()
+            self._evict_if_needed()
+            self._conn.commit()
+
+    def _flush_touches(self) -> None:
+        if not self._pending_touches:
+            return
+        self._conn.executemany(
+            "UPDATE embedding_cache SET last_used = ? "
+            "WHERE model = ? AND text_hash = ?",
+            [(used, model, h) for (model, h), used in self._pending_touches.items()],
+        )
+        self._pending_touches = {}
+
+    def _evict_if_needed(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+        if count <= self.max_entries:
+            return
+
+        target = int(self.max_entries * (1 - EVICT_FRACTION))
+        self._conn.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN ("
+            "SELECT rowid FROM embedding_cache ORDER BY last_used LIMIT ?)",
+            (count - target,),
+        )
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            (size,) = self._conn.execute(
+                "SELECT COUNT(*) FROM embedding_cache"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": size,
+                "max_entries": self.max_entries,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that consults an EmbeddingCache first and
+    only sends cache misses to the underlying model.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.cache.get_many(self.model_name, texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in cached))
+
+        if missing:
+            vectors = self.embeddings.embed_documents(missing)
+            self.cache.put_many(self.model_name, missing, vectors)
+            cached.update(zip(missing, vectors))
+
+        return [cached[t] for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        cached = self.cache.get_many(self.model_name, [text])
+        if text in cached:
+            return cached[text]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(self.model_name, [text], [vector])
+        return vector
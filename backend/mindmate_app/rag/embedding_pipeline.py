@@ -0,0 +1,161 @@
+# mindmate_app/rag/embedding_pipeline.py
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .embedding_cache import EmbeddingCache
+
+# Defaults can be tuned per deployment without code changes.
+# MINDMATE_EMBED_WORKERS=0 means "one worker per CPU core".
+EMBED_BATCH_SIZE = int(os.getenv("MINDMATE_EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("MINDMATE_EMBED_WORKERS", "1"))
+
+# Model instance owned by each worker process (set by _init_worker)
+_worker_model = None
+
+
+def iter_batches(items: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """
+    Group an iterable of chunks into fixed-size lists.
+    The last batch may be shorter.
+    """
+    it = iter(items)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _init_worker(model_name: str, threads_per_worker: int) -> None:
+    """
+    Load the embedding model once per worker process.
+    """
+    global _worker_model
+    try:
+        import torch
+
+        # Stop every worker from grabbing all cores at once
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    from langchain_community.embeddings import SentenceTransformerEmbeddings
+
+    _worker_model = SentenceTransformerEmbeddings(model_name=model_name)
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    return _worker_model.embed_documents(texts)
+
+
+class BatchedEmbedder:
+    """
+    Embeds a stream of chunks in fixed-size batches.
+
+    With num_workers == 1 batches are embedded in the calling process with
+    the given embedding function. With more workers a process pool is used
+    (one model copy per worker) and a bounded number of batches are kept in
+    flight, so memory stays flat no matter how long the input stream is.
+    Results are always yielded in input order. If an EmbeddingCache is
+    given, cached texts are served from it and new vectors are stored in it.
+    """
+
+    def __init__(
+        self,
+        embedding_function,
+        model_name: str,
+        batch_size: int | None = None,
+        num_workers: int | None = None,
+        cache: EmbeddingCache | None = None,
+    ):
+        if batch_size is None:
+            batch_size = EMBED_BATCH_SIZE
+        if num_workers is None:
+            num_workers = EMBED_WORKERS
+        if num_workers <= 0:
+            num_workers = os.cpu_count() or 1
+
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.num_workers = num_workers
+        self.cache = cache
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+            # "spawn" avoids inheriting torch/OpenMP state from the parent,
+            # which can deadlock forked workers.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, threads),
+            )
+        return self._pool
+
+    def embed_stream(
+        self, chunks: Iterable[str]
+    ) -> Iterator[Tuple[List[str], List[List[float]]]]:
+        """
+        Yield (texts, vectors) pairs, one per batch, as soon as each batch
+        has been embedded. Texts found in the embedding cache are not sent
+        to the model.
+        """
+        batches = iter_batches(chunks, self.batch_size)
+
+        if self.num_workers == 1:
+            for batch in batches:
+                cached, missing = self._split_cached(batch)
+                vectors = self.embedding_function.embed_documents(missing) if missing else []
+                yield batch, self._merge(batch, cached, missing, vectors)
+            return
+
+        pool = self._get_pool()
+        max_in_flight = self.num_workers * 2
+        pending: deque = deque()
+
+        def collect():
+            batch, cached, missing, future = pending.popleft()
+            vectors = future.result() if future is not None else []
+            return batch, self._merge(batch, cached, missing, vectors)
+
+        for batch in batches:
+            cached, missing = self._split_cached(batch)
+            future = pool.submit(_embed_batch, missing) if missing else None
+            pending.append((batch, cached, missing, future))
+            if len(pending) >= max_in_flight:
+                yield collect()
+
+        while pending:
+            yield collect()
+
+    def _split_cached(self, batch: List[str]) -> Tuple[Dict[str, List[float]], List[str]]:
+        if self.cache is None:
+            return {}, list(dict.fromkeys(batch))
+        cached = self.cache.get_many(self.model_name, batch)
+        missing = list(dict.fromkeys(t for t in batch if t not in cached))
+        return cached, missing
+
+    def _merge(
+        self,
+        batch: List[str],
+        cached: Dict[str, List[float]],
+        missing: List[str],
+        vectors: List[List[float]],
+    ) -> List[List[float]]:
+        if missing:
+            if self.cache is not None:
+                self.cache.put_many(self.model_name, missing, vectors)
+            cached = cached | dict(zip(missing, vectors))
+        return [cached[t] for t in batch]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
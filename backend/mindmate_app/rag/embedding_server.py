@@ -0,0 +1,140 @@
+# mindmate_app/rag/embedding_server.py
+"""
+Embedding sidecar: one process holds the embedding model and web workers
+call it over a Unix socket, so N workers cost one copy of the model and
+none of them pays the model's cold start.
+
+Start it with `python manage.py run_embedding_server` and point the web
+processes at it with MINDMATE_EMBEDDING_SOCKET=<path>.
+
+Wire format, both directions: a 4-byte big-endian length, then a JSON
+payload. Requests are {"texts": [...], "query": bool}; responses are
+{"vectors": [[...], ...]} or {"error": "..."}.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_SOCKET_TIMEOUT = float(os.getenv("MINDMATE_EMBEDDING_SOCKET_TIMEOUT", "30"))
+_HEADER = struct.Struct(">I")
+
+
+def _send(sock: socket.socket, payload: Dict[str, Any]) -> None:
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        part = sock.recv(size - len(buf))
+        if not part:
+            raise ConnectionError("embedding socket closed")
+        buf += part
+    return bytes(buf)
+
+
+def _recv(sock: socket.socket) -> Dict[str, Any]:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size))
+
+
+class SocketEmbeddings(Embeddings):
+    """
+    Embeddings client for the sidecar. Each thread keeps its own
+    connection; a dropped connection is re-opened once per call.
+    """
+
+    def __init__(self, socket_path: str, timeout: float | None = None):
+        self.socket_path = socket_path
+        self.timeout = EMBEDDING_SOCKET_TIMEOUT if timeout is None else timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._local.sock = sock
+        return sock
+
+    def _request(self, texts: List[str], query: bool) -> List[List[float]]:
+        for attempt in (1, 2):
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._connect()
+                _send(sock, {"texts": texts, "query": query})
+                reply = _recv(sock)
+                break
+            except (ConnectionError, OSError):
+                if sock is not None:
+                    sock.close()
+                self._local.sock = None
+                if attempt == 2:
+                    raise
+        if "error" in reply:
+            raise RuntimeError(f"embedding server: {reply['error']}")
+        return reply["vectors"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._request(list(texts), query=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._request([text], query=True)[0]
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        model: Embeddings = self.server.model
+        while True:
+            try:
+                request = _recv(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                texts = request["texts"]
+                if request.get("query"):
+                    vectors = [model.embed_query(t) for t in texts]
+                else:
+                    vectors = model.embed_documents(texts)
+                reply = {"vectors": [list(map(float, v)) for v in vectors]}
+            except Exception as e:
+                logger.exception("Embedding request failed")
+                reply = {"error": str(e)}
+            _send(self.request, reply)
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model: Embeddings):
+        path = Path(socket_path)
+        if path.exists():
+            # left behind by a previous run
+            path.unlink()
+        self.model = model
+        super().__init__(str(path), _Handler)
+
+
+def serve(socket_path: str, model: Embeddings) -> None:
+    """
+    Serve `model` on `socket_path` until interrupted.
+    """
+    with EmbeddingServer(socket_path, model) as server:
+        logger.info("Embedding server listening on %s", socket_path)
+        try:
+            server.serve_forever()
+        finally:
+            Path(socket_path).unlink(missing_ok=True)
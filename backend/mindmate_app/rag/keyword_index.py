@@ -0,0 +1,183 @@
+# mindmate_app/rag/keyword_index.py
+"""
+BM25 keyword search over chunk text, used next to vector search so exact
+course terms and formula names are found even when embeddings miss them.
+
+The inverted index is SQLite FTS5 (one file per collection), which stores
+compressed postings and ranks with BM25 out of the box. It is kept in step
+with Chroma by MindMateVectorStore.add_document.
+"""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Reciprocal rank fusion constant (Cormack et al. use 60)
+RRF_K = 60
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _match_expression(query: str) -> str:
+    """
+    Turn free text into an FTS5 query: every term quoted (so user input
+    can't inject FTS syntax) and OR-ed together, letting BM25 do the ranking.
+    """
+    terms = dict.fromkeys(t.lower() for t in _TOKEN_RE.findall(query))
+    return " OR ".join(f'"{t}"' for t in terms)
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]], k: int, rrf_k: int = RRF_K
+) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists: each result scores sum(1 / (rrf_k + rank))
+    over the lists it appears in. Results are matched on chunk content, so
+    identical chunks from different lists collapse into one.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, r in enumerate(results, start=1):
+            entry = fused.setdefault(r["content"], {**r, "score": 0.0})
+            entry["score"] += 1.0 / (rrf_k + rank)
+
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:k]
+
+
+class KeywordIndex:
+    """
+    Incrementally maintained BM25 index for one collection.
+    Rows are keyed by the chunk's Chroma id.
+
+    The SQLite connection is opened on first use and can be released with
+    close(); a closed index reopens itself if it is used again.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        # callers hold self._lock
+        if self._conn is not None:
+            return self._conn
+
+        conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # so INSERT OR REPLACE fires the delete trigger for the old row
+        conn.execute("PRAGMA recursive_triggers=ON")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                chunk_key TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content,
+                content='chunks',
+                content_rowid='id',
+                tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content)
+                VALUES ('delete', old.id, old.content);
+            END;
+            """
+        )
+        conn.commit()
+        self._conn = conn
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def count(self) -> int:
+        with self._lock:
+            (n,) = self._connect().execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return n
+
+    def add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+    ) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_key, content, metadata) "
+                "VALUES (?, ?, ?)",
+                [
+                    (chunk_id, doc, json.dumps(meta))
+                    for chunk_id, doc, meta in zip(ids, documents, metadatas)
+                ],
+            )
+            conn.commit()
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE chunk_key = ?",
+                [(json.dumps(meta), chunk_id) for chunk_id, meta in zip(ids, metadatas)],
+            )
+            conn.commit()
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "DELETE FROM chunks WHERE chunk_key = ?", [(i,) for i in ids]
+            )
+            conn.commit()
+
+    def rebuild_from(self, collection, page_size: int = 5000) -> None:
+        """
+        Index everything already stored in a Chroma collection.
+        """
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if not page["ids"]:
+                break
+            self.add(page["ids"], page["documents"], page["metadatas"])
+            offset += len(page["ids"])
+
+    def search(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """
+        Top-k chunks by BM25. "score" is the BM25 score (higher is better).
+        """
+        expression = _match_expression(query)
+        if not expression or k <= 0:
+            return []
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT c.content, c.metadata, bm25(chunks_fts) AS rank "
+                "FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY rank LIMIT ?",
+                (expression, k),
+            ).fetchall()
+
+        # FTS5's bm25() is negated so that ORDER BY ascending ranks best first
+        return [
+            {"content": content, "metadata": json.loads(meta), "score": -rank}
+            for content, meta, rank in rows
+        ]
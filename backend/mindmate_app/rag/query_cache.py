@@ -0,0 +1,140 @@
+# mindmate_app/rag/query_cache.py
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("MINDMATE_QUERY_CACHE_MAX_ENTRIES", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("MINDMATE_QUERY_CACHE_TTL", "600"))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case- and whitespace-insensitive form of a query, used as the cache key.
+    """
+    return " ".join(query.lower().split())
+
+
+class IndexGeneration:
+    """
+    Per-collection tokens that change every time that collection of the
+    vector store is written to, so one user's upload leaves every other
+    user's cached queries valid.
+
+    Each token lives in a small file under `directory` rather than in
+    memory, because documents are indexed by the ingestion worker while
+    queries are served by the web workers. Each write stores a fresh random
+    token rather than incrementing a counter, so two workers bumping at
+    once can't both land on the same value.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def _path(self, collection: str) -> Path:
+        return self.directory / collection
+
+    def current(self, collection: str) -> str:
+        try:
+            return self._path(collection).read_text().strip()
+        except FileNotFoundError:
+            return ""
+
+    def bump(self, collection: str) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(collection)
+        new_value = uuid.uuid4().hex
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(new_value)
+        os.replace(tmp_path, path)  # atomic swap
+        return new_value
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of (collection, key) -> search results with a TTL.
+
+    Every entry remembers the generation of its collection it was computed
+    under; entries from an older generation are treated as misses, so
+    results never outlive a write to that collection. Callers read the
+    generation before searching and pass it to set(), so results computed
+    while the index changed are never filed under the new generation.
+    """
+
+    def __init__(
+        self,
+        generation: IndexGeneration,
+        max_entries: int | None = None,
+        ttl_seconds: float | None = None,
+    ):
+        if max_entries is None:
+            max_entries = QUERY_CACHE_MAX_ENTRIES
+        if ttl_seconds is None:
+            ttl_seconds = QUERY_CACHE_TTL_SECONDS
+
+        self.generation = generation
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._lock = threading.Lock()
+        # (collection, key) -> (generation, expires_at, results)
+        self._entries: "OrderedDict[Tuple, Tuple[str, float, List[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, collection: str, key: Tuple) -> List[Dict[str, Any]] | None:
+        generation = self.generation.current(collection)
+        key = (collection, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            entry_generation, expires_at, results = entry
+            if entry_generation != generation or expires_at < time.monotonic():
+                if entry_generation != generation:
+                    self.invalidations += 1
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(results)
+
+    def set(
+        self,
+        collection: str,
+        key: Tuple,
+        results: List[Dict[str, Any]],
+        generation: str,
+    ) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        key = (collection, key)
+        with self._lock:
+            self._entries[key] = (generation, expires_at, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
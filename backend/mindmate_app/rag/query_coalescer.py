@@ -0,0 +1,141 @@
+# mindmate_app/rag/query_coalescer.py
+"""
+Micro-batching for search query embeddings.
+
+Under load many retrieval threads each embed a single query, paying the
+model's per-call overhead every time. QueryCoalescer gathers the queries
+that arrive within a short window into one embed_documents call and
+hands each caller its own vector.
+
+There is no background thread (so nothing to restart after a gunicorn
+fork): the first caller of a batch becomes its leader, waits out the
+window (or until the batch is full), runs the batch, and then passes the
+lead to the next queued caller if more arrived meanwhile. Batches run one
+at a time, so queries pile up behind a running batch and go together. The window is only
+waited out once the previous batch held more than one query, so a lone
+caller on a quiet worker isn't delayed.
+
+Batching queries through embed_documents assumes a symmetric model, where
+a query and a document embed the same way, as with all-MiniLM-L6-v2.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+# How long the first query of a batch waits for others (0 disables batching)
+QUERY_BATCH_WINDOW_MS = float(os.getenv("MINDMATE_QUERY_BATCH_WINDOW_MS", "2"))
+QUERY_BATCH_MAX_SIZE = int(os.getenv("MINDMATE_QUERY_BATCH_MAX_SIZE", "32"))
+
+
+class _PendingQuery:
+    __slots__ = ("text", "vector", "error", "lead", "wake")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.vector: List[float] | None = None
+        self.error: BaseException | None = None
+        self.lead = False
+        # set when the vector is ready, or when this caller must lead
+        self.wake = threading.Event()
+
+
+class QueryCoalescer:
+    """
+    Thread-safe embed_query that batches concurrent callers.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        window_ms: float | None = None,
+        max_batch_size: int | None = None,
+    ):
+        self.embeddings = embeddings
+        self.window = (QUERY_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch_size = max(
+            1, QUERY_BATCH_MAX_SIZE if max_batch_size is None else max_batch_size
+        )
+
+        self._cond = threading.Condition()
+        self._queue: List[_PendingQuery] = []
+        self._leading = False
+        self._last_batch_size = 0
+        self.batches = 0
+        self.queries = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch_size > 1
+
+    def embed_query(self, text: str) -> List[float]:
+        if not self.enabled:
+            return self.embeddings.embed_query(text)
+
+        query = _PendingQuery(text)
+        with self._cond:
+            self._queue.append(query)
+            if not self._leading:
+                self._leading = True
+                query.lead = True
+            elif len(self._queue) >= self.max_batch_size:
+                self._cond.notify()  # the leader needn't wait any longer
+
+        if not query.lead:
+            query.wake.wait()
+        if query.lead:
+            # our own query is at the head of the queue, so it is in this batch
+            self._run_batch()
+
+        if query.error is not None:
+            raise query.error
+        return query.vector
+
+    def _run_batch(self) -> None:
+        # no concurrency last time: don't make this caller wait for company
+        window = self.window if self._last_batch_size > 1 else 0
+        deadline = time.monotonic() + window
+        with self._cond:
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:self.max_batch_size]
+            self._last_batch_size = len(batch)
+            self.batches += 1
+            self.queries += len(batch)
+
+        try:
+            vectors = self.embeddings.embed_documents([q.text for q in batch])
+        except Exception as e:
+            for q in batch:
+                q.error = e
+        else:
+            for q, vector in zip(batch, vectors):
+                q.vector = vector
+
+        # Queries that arrived while this batch ran form the next one
+        with self._cond:
+            if self._queue:
+                successor = self._queue[0]
+                successor.lead = True
+                successor.wake.set()
+            else:
+                self._leading = False
+        for q in batch:
+            q.wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "batches": self.batches,
+                "queries": self.queries,
+                "avg_batch_size": self.queries / self.batches if self.batches else 0.0,
+            }
@@ -1,51 +1,177 @@
 import os
 import json
-from typing import List, Dict, Any
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, List, Dict, Any, Tuple
 from typing import List, Dict
 
+from asgiref.sync import async_to_sync
 from dotenv import load_dotenv
-from groq import Groq
 
-from .vector_store import get_vector_store
+from .. import llm
+from ..response_cache import get_response_cache, response_key, scope_key
+from . import vector_store
+from .context_packing import pack_chunks, token_budget_for
+from .query_cache import IndexGeneration, QueryCache, normalize_query
+from .vector_store import VECTOR_STORE_DIR, collection_name_for, get_vector_store
 
 load_dotenv()
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+logger = logging.getLogger(__name__)
+
+# Async views run retrieval (query embedding + search) here so it never
+# blocks the event loop; the bound keeps CPU use predictable under load.
+RETRIEVAL_THREADS = int(os.getenv("MINDMATE_RETRIEVAL_THREADS", "8"))
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_THREADS, thread_name_prefix="retrieval"
+)
+
+# Retrieval results are cached per (normalized query, k); index_document
+# bumps the generation of the collection it wrote to, so cached results
+# for that user never go stale and other users' stay cached.
+index_generation = IndexGeneration(VECTOR_STORE_DIR / "index_generations")
+query_cache = QueryCache(index_generation)
+
+
+def index_document(
+    text: str,
+    title: str,
+    source: str,
+    progress_callback: Callable[[int, int], None] | None = None,
+    user_id: int | None = None,
+) -> int:
+    """
+    Add a document to `user_id`'s part of the vector store and return
+    number of chunks indexed.
+    """
+    store = get_vector_store()
+    metadata = {"title": title, "source": source}
+    try:
+        num_chunks = store.add_document(
+            text=text,
+            metadata=metadata,
+            progress_callback=progress_callback,
+            user_id=user_id,
+        )
+    finally:
+        # even a partial write changes what search can return
+        index_generation.bump(collection_name_for(user_id))
+    return num_chunks
 
 
-def index_document(text: str, title: str, source: str) -> int:
+def index_pages(
+    pages: Iterable[Tuple[int | None, str]],
+    title: str,
+    source: str,
+    progress_callback: Callable[[int, int], None] | None = None,
+    user_id: int | None = None,
+) -> int:
     """
-    Add a document to the vector store and return number of chunks indexed.
+    index_document for (page_number, text) pairs, e.g. from
+    document_loader.iter_pdf_pages. Chunks keep their page number.
     """
     store = get_vector_store()
     metadata = {"title": title, "source": source}
-    num_chunks = store.add_document(text=text, metadata=metadata)
+    try:
+        num_chunks = store.add_pages(
+            pages=pages,
+            metadata=metadata,
+            progress_callback=progress_callback,
+            user_id=user_id,
+        )
+    finally:
+        index_generation.bump(collection_name_for(user_id))
     return num_chunks
 
 
-def retrieve_relevant_chunks(query: str, k: int = 4) -> List[Dict[str, Any]]:
+def delete_document_chunks(source: str, user_id: int | None = None) -> int:
     """
-    Retrieve top-k relevant chunks for a given query.
+    Remove a document's chunks from `user_id`'s part of the vector store.
     """
+    try:
+        return get_vector_store().delete_source(source, user_id=user_id)
+    finally:
+        index_generation.bump(collection_name_for(user_id))
+
+
+def retrieve_relevant_chunks(
+    query: str, k: int = 4, user_id: int | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve top-k relevant chunks for a given query from `user_id`'s documents.
+    Served from query_cache when the same query was answered since the
+    last index write.
+    """
+    collection = collection_name_for(user_id)
+    key = (normalize_query(query), k)
+    cached = query_cache.get(collection, key)
+    if cached is not None:
+        return cached
+
+    # read before searching: a write that lands mid-search must still
+    # invalidate these results
+    generation = index_generation.current(collection)
     store = get_vector_store()
-    results = store.search(query=query, k=k)
+    results = store.search(query=query, k=k, user_id=user_id)
+    query_cache.set(collection, key, results, generation)
     return results
 
 
-def build_context_from_chunks(chunks: List[Dict[str, Any]]) -> str:
+async def run_in_retrieval_pool(fn: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        retrieval_executor, functools.partial(fn, *args, **kwargs)
+    )
+
+
+def get_cache_stats() -> Dict[str, Any]:
     """
-    Turn retrieved chunks into a single context string to feed an LLM.
+    Counters for the retrieval and LLM response caches (used by the
+    debug endpoint).
+    The embedding cache is only reported once the vector store is loaded,
+    so this never triggers a model load.
     """
-    parts = []
-    for idx, c in enumerate(chunks):
-        meta = c.get("metadata", {})
-        title = meta.get("title", "Unknown document")
-        chunk_id = meta.get("chunk_id", idx)
-        parts.append(
-            f"[Source: {title}, Chunk {chunk_id}]\n{c['content']}\n"
-        )
+    stats: Dict[str, Any] = {
+        "query_cache": query_cache.stats(),
+        "llm_response_cache": get_response_cache().stats(),
+    }
+    store = vector_store._vector_store_instance
+    if store is not None:
+        stats["embedding_cache"] = store.embedding_cache.stats()
+        stats["query_batching"] = store.query_embedder.stats()
+    return stats
 
-    return "\n\n---\n\n".join(parts)
 
+def build_context_from_chunks(
+    chunks: List[Dict[str, Any]], model: str | None = None
+) -> str:
+    """
+    Turn retrieved chunks into a single context string to feed an LLM,
+    deduplicated, merged and trimmed to `model`'s token budget.
+    """
+    packed = pack_chunks(chunks, token_budget_for(model))
+    logger.info(
+        "context for %s: %d tokens, %d saved (%d of %d chunks used)",
+        model,
+        packed["tokens"],
+        packed["tokens_saved"],
+        packed["chunks_used"],
+        packed["chunks_in"],
+    )
+    return packed["text"]
+
+
+EXPLAIN_MODEL = "llama-3.3-70b-versatile"
+EXPLAIN_TEMPERATURE = 0.3
+QUIZ_MODEL = "llama-3.1-8b-instant"  # or llama-3.1-70b-versatile
+CHAT_MODEL = "llama-3.3-70b-versatile"
+
+NO_CONTEXT_ANSWER = (
+    "I couldn't find any relevant information in your uploaded documents "
+    "for this question. Try uploading more notes or a different file."
+)
 
 
 EXPLAIN_SYSTEM_PROMPT = """
@@ -63,23 +189,107 @@ Rules:
 """
 
 
-def explain_with_llm(question: str, k: int = 4) -> Dict[str, Any]:
+def explain_with_llm(
+    question: str, k: int = 4, user_id: int | None = None
+) -> Dict[str, Any]:
+    """
+    Blocking wrapper around explain_with_llm_async (scripts, the shell).
+    """
+    return async_to_sync(explain_with_llm_async)(question, k=k, user_id=user_id)
+
+
+async def explain_with_llm_async(
+    question: str, k: int = 4, user_id: int | None = None
+) -> Dict[str, Any]:
     """
     Use vector search to get relevant chunks, then have the LLM create
     a clean explanation based on those chunks.
     """
-    chunks = retrieve_relevant_chunks(question, k=k)
+    chunks = await run_in_retrieval_pool(
+        retrieve_relevant_chunks, question, k=k, user_id=user_id
+    )
     if not chunks:
         return {
             "question": question,
-            "answer": (
-                "I couldn't find any relevant information in your uploaded documents "
-                "for this question. Try uploading more notes or a different file."
-            ),
+            "answer": NO_CONTEXT_ANSWER,
             "chunks": [],
         }
 
-    context = build_context_from_chunks(chunks)
+    messages, cache_args = _explain_cache_args(question, chunks)
+    cache = get_response_cache()
+    answer = await run_in_retrieval_pool(cache.get, "explain", **cache_args)
+    if answer is None:
+        answer = (
+            await llm.achat(
+                model=EXPLAIN_MODEL, messages=messages, temperature=EXPLAIN_TEMPERATURE
+            )
+        ).strip()
+        await run_in_retrieval_pool(cache.set, "explain", value=answer, **cache_args)
+
+    return {
+        "question": question,
+        "answer": answer,
+        "chunks": chunks,
+    }
+
+
+async def explain_with_llm_astream(
+    question: str, k: int = 4, user_id: int | None = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of explain_with_llm_async. Yields (event, data) pairs:
+    "sources" with the retrieved chunks first, then one "token" per text
+    delta from the LLM, then "done" with the full answer.
+    """
+    chunks = await run_in_retrieval_pool(
+        retrieve_relevant_chunks, question, k=k, user_id=user_id
+    )
+    yield "sources", {"chunks": chunks}
+
+    if not chunks:
+        yield "done", {"question": question, "answer": NO_CONTEXT_ANSWER}
+        return
+
+    messages, cache_args = _explain_cache_args(question, chunks)
+    cache = get_response_cache()
+    answer = await run_in_retrieval_pool(cache.get, "explain", **cache_args)
+    if answer is not None:
+        yield "token", {"text": answer}
+        yield "done", {"question": question, "answer": answer}
+        return
+
+    parts = []
+    async for delta in llm.astream_chat(
+        model=EXPLAIN_MODEL, messages=messages, temperature=EXPLAIN_TEMPERATURE
+    ):
+        parts.append(delta)
+        yield "token", {"text": delta}
+
+    answer = "".join(parts).strip()
+    await run_in_retrieval_pool(cache.set, "explain", value=answer, **cache_args)
+    yield "done", {"question": question, "answer": answer}
+
+
+def _explain_cache_args(
+    question: str, chunks: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
+    """
+    Prompt messages plus the response-cache lookup arguments. Semantic
+    matches on the question only count when the retrieved context is the
+    same, so a cached answer is never reused for different notes.
+    """
+    messages = _explain_messages(question, chunks)
+    return messages, {
+        "key": response_key(messages, EXPLAIN_MODEL, EXPLAIN_TEMPERATURE),
+        "semantic_text": normalize_query(question),
+        "scope": scope_key(
+            EXPLAIN_MODEL, EXPLAIN_TEMPERATURE, [c["content"] for c in chunks]
+        ),
+    }
+
+
+def _explain_messages(question: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    context = build_context_from_chunks(chunks, model=EXPLAIN_MODEL)
 
     user_prompt = f"""
                     QUESTION:
@@ -89,26 +299,16 @@ def explain_with_llm(question: str, k: int = 4) -> Dict[str, Any]:
                     {context}
                 """
 
-    completion = groq_client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": EXPLAIN_SYSTEM_PROMPT},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.3,
-    )
-
-    answer_text = completion.choices[0].message.content
-
-    return {
-        "question": question,
-        "answer": answer_text.strip(),
-        "chunks": chunks,
-    }
+    return [
+        {"role": "system", "content": EXPLAIN_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
 
 
-def simple_quiz_from_chunks(topic: str, num_questions: int = 5) -> Dict[str, Any]:
-    chunks = retrieve_relevant_chunks(topic, k=num_questions)
+def simple_quiz_from_chunks(
+    topic: str, num_questions: int = 5, user_id: int | None = None
+) -> Dict[str, Any]:
+    chunks = retrieve_relevant_chunks(topic, k=num_questions, user_id=user_id)
     questions: List[Dict[str, Any]] = []
 
     if not chunks:
@@ -175,20 +375,94 @@ Rules:
 """
 
 
-def quiz_with_llm(topic: str, num_questions: int = 5) -> Dict[str, Any]:
+def quiz_with_llm(
+    topic: str, num_questions: int = 5, user_id: int | None = None
+) -> Dict[str, Any]:
+    """
+    Blocking wrapper around quiz_with_llm_async (scripts, the shell).
+    """
+    return async_to_sync(quiz_with_llm_async)(
+        topic, num_questions=num_questions, user_id=user_id
+    )
+
+
+async def quiz_with_llm_async(
+    topic: str, num_questions: int = 5, user_id: int | None = None
+) -> Dict[str, Any]:
     """
     Use vector search to get relevant chunks, then have the LLM
     generate multiple-choice questions from those chunks.
     Falls back to simple_quiz_from_chunks if anything fails.
     """
-    chunks = retrieve_relevant_chunks(topic, k=max(6, num_questions * 2))
+    chunks = await run_in_retrieval_pool(
+        retrieve_relevant_chunks, topic, k=max(6, num_questions * 2), user_id=user_id
+    )
     if not chunks:
         return {
             "topic": topic,
             "questions": [],
         }
 
-    context = build_context_from_chunks(chunks)
+    try:
+        raw = await llm.achat(
+            model=QUIZ_MODEL,
+            messages=_quiz_messages(topic, chunks, num_questions),
+            temperature=0.4,
+        )
+        return _parse_quiz(raw, topic, num_questions)
+    except Exception as e:
+        logger.warning("quiz generation failed, using simple_quiz_from_chunks: %s", e)
+        return await run_in_retrieval_pool(
+            simple_quiz_from_chunks,
+            topic=topic,
+            num_questions=num_questions,
+            user_id=user_id,
+        )
+
+
+async def quiz_with_llm_astream(
+    topic: str, num_questions: int = 5, user_id: int | None = None
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of quiz_with_llm_async. Yields "sources", then the raw
+    JSON as "token" deltas, then "done" with the parsed quiz (or the
+    fallback quiz if the model output can't be parsed).
+    """
+    chunks = await run_in_retrieval_pool(
+        retrieve_relevant_chunks, topic, k=max(6, num_questions * 2), user_id=user_id
+    )
+    yield "sources", {"chunks": chunks}
+
+    if not chunks:
+        yield "done", {"topic": topic, "questions": []}
+        return
+
+    parts = []
+    try:
+        async for delta in llm.astream_chat(
+            model=QUIZ_MODEL,
+            messages=_quiz_messages(topic, chunks, num_questions),
+            temperature=0.4,
+        ):
+            parts.append(delta)
+            yield "token", {"text": delta}
+        result = _parse_quiz("".join(parts), topic, num_questions)
+    except Exception as e:
+        logger.warning("quiz generation failed, using simple_quiz_from_chunks: %s", e)
+        result = await run_in_retrieval_pool(
+            simple_quiz_from_chunks,
+            topic=topic,
+            num_questions=num_questions,
+            user_id=user_id,
+        )
+
+    yield "done", result
+
+
+def _quiz_messages(
+    topic: str, chunks: List[Dict[str, Any]], num_questions: int
+) -> List[Dict[str, str]]:
+    context = build_context_from_chunks(chunks, model=QUIZ_MODEL)
 
     user_prompt = f"""
 TOPIC:
@@ -200,34 +474,40 @@ CONTEXT (from the user's notes):
 Number of questions to generate: {num_questions}
 """
 
-    try:
-        completion = groq_client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # or llama-3.1-70b-versatile
-            messages=[
-                {"role": "system", "content": QUIZ_SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.4,
-        )
+    return [
+        {"role": "system", "content": QUIZ_SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
 
-        raw = completion.choices[0].message.content
-        data = json.loads(raw)
 
-        # Basic validation / trimming
-        questions = data.get("questions", [])[:num_questions]
-        return {
-            "topic": data.get("topic", topic),
-            "questions": questions,
-        }
-    except Exception as e:
-        # If the model returns non-JSON or anything breaks, fall back
-        print("quiz_with_llm error, falling back to simple_quiz_from_chunks:", e)
-        return simple_quiz_from_chunks(topic=topic, num_questions=num_questions)
+def _parse_quiz(raw: str, topic: str, num_questions: int) -> Dict[str, Any]:
+    data = json.loads(raw)
+
+    # Basic validation / trimming
+    questions = data.get("questions", [])[:num_questions]
+    return {
+        "topic": data.get("topic", topic),
+        "questions": questions,
+    }
 
 
 def chat_with_knowledge_base(
     messages: List[Dict[str, str]],
     top_k: int = 4,
+    user_id: int | None = None,
+) -> Dict:
+    """
+    Blocking wrapper around chat_with_knowledge_base_async (scripts, the shell).
+    """
+    return async_to_sync(chat_with_knowledge_base_async)(
+        messages, top_k=top_k, user_id=user_id
+    )
+
+
+async def chat_with_knowledge_base_async(
+    messages: List[Dict[str, str]],
+    top_k: int = 4,
+    user_id: int | None = None,
 ) -> Dict:
     """
     Simple chat helper that:
@@ -237,31 +517,66 @@ def chat_with_knowledge_base(
     - calls the LLM using your existing pipeline
     Returns: {"reply": str, "chunks": [...]}.
     """
+    last_user_msg = _last_user_message(messages)
+    if not last_user_msg:
+        return {"reply": "I didn't receive a question.", "chunks": []}
 
-    from .vector_store import get_vector_store
-    from .llm import call_llm  # adjust import if your helper name is different
+    sources = await run_in_retrieval_pool(
+        retrieve_relevant_chunks, last_user_msg, k=top_k, user_id=user_id
+    )
+    reply_text = await llm.achat(
+        model=CHAT_MODEL,
+        messages=[{"role": "user", "content": _chat_prompt(messages, sources)}],
+        temperature=0.3,
+    )
+
+    return {
+        "reply": reply_text.strip(),
+        "chunks": sources,
+    }
 
-    # 1) get last user message
-    last_user_msg = None
-    for m in reversed(messages):
-        if m.get("role") == "user":
-            last_user_msg = m.get("content", "").strip()
-            break
 
+async def chat_with_knowledge_base_astream(
+    messages: List[Dict[str, str]],
+    top_k: int = 4,
+    user_id: int | None = None,
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Streaming variant of chat_with_knowledge_base_async. Yields "sources",
+    then "token" deltas, then "done" with the full reply.
+    """
+    last_user_msg = _last_user_message(messages)
     if not last_user_msg:
-        return {"reply": "I didn't receive a question.", "chunks": []}
+        yield "sources", {"chunks": []}
+        yield "done", {"reply": "I didn't receive a question."}
+        return
 
-    store = get_vector_store()
-    docs = store.similarity_search(last_user_msg, k=top_k)
+    sources = await run_in_retrieval_pool(
+        retrieve_relevant_chunks, last_user_msg, k=top_k, user_id=user_id
+    )
+    yield "sources", {"chunks": sources}
 
-    context_text = "\n\n".join(d.page_content for d in docs)
-    sources = [
-        {
-            "content": d.page_content,
-            "metadata": getattr(d, "metadata", {}),
-        }
-        for d in docs
-    ]
+    parts = []
+    async for delta in llm.astream_chat(
+        model=CHAT_MODEL,
+        messages=[{"role": "user", "content": _chat_prompt(messages, sources)}],
+        temperature=0.3,
+    ):
+        parts.append(delta)
+        yield "token", {"text": delta}
+
+    yield "done", {"reply": "".join(parts).strip()}
+
+
+def _last_user_message(messages: List[Dict[str, str]]) -> str | None:
+    for m in reversed(messages):
+        if m.get("role") == "user":
+            return m.get("content", "").strip()
+    return None
+
+
+def _chat_prompt(messages: List[Dict[str, str]], sources: List[Dict[str, Any]]) -> str:
+    context_text = build_context_from_chunks(sources, model=CHAT_MODEL)
 
     system_instructions = (
         "You are MindMate AI, a friendly study assistant. "
@@ -282,12 +597,4 @@ def chat_with_knowledge_base(
         elif role == "assistant":
             history_str += f"Assistant: {content}\n"
 
-    full_prompt = system_instructions + "Conversation so far:\n" + history_str + "\nAssistant:"
-
-    reply_text = call_llm(full_prompt)
-
-    return {
-        "reply": reply_text,
-        "chunks": sources,
-    }
-
+    return system_instructions + "Conversation so far:\n" + history_str + "\nAssistant:"
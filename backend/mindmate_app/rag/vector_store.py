@@ -1,13 +1,146 @@
 # mindmate_app/rag/vector_store.py
-from typing import List, Dict, Any
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Iterable, List, Dict, Any, Tuple
 from pathlib import Path
 
 from langchain_community.vectorstores import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import SentenceTransformerEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from .backends import (
+    NUMPY_BACKEND_MAX_VECTORS,
+    ChromaBackend,
+    NumpyBackend,
+    SearchBackend,
+)
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .embedding_pipeline import BatchedEmbedder
+from .embedding_server import SocketEmbeddings
+from .keyword_index import KeywordIndex, reciprocal_rank_fusion
+from .query_coalescer import QueryCoalescer
 
 # Where ChromaDB will store data (folder created automatically)
 VECTOR_STORE_DIR = Path("mindmate_vector_store")
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# Path of a `manage.py run_embedding_server` socket; when set, embeddings
+# come from that process instead of a model loaded in this one
+EMBEDDING_SOCKET = os.getenv("MINDMATE_EMBEDDING_SOCKET", "")
+# Max hashes per Chroma "$in" lookup
+HASH_LOOKUP_BATCH = 500
+# Fuse BM25 keyword results with vector results (set to 0 to disable)
+HYBRID_SEARCH = os.getenv("MINDMATE_HYBRID_SEARCH", "1") == "1"
+# Each retriever contributes k * this many candidates to the fusion
+HYBRID_CANDIDATE_FACTOR = 3
+# Chunks diffed, embedded and written together by add_document/add_pages
+INDEX_WINDOW_CHUNKS = int(os.getenv("MINDMATE_INDEX_WINDOW_CHUNKS", "1024"))
+# Collection used for documents that don't belong to a user (and for
+# everything indexed before per-user collections existed)
+SHARED_COLLECTION_NAME = "langchain"
+# Per-collection Chroma wrappers, NumPy indexes and BM25 connections kept
+# open at once; the least recently used are dropped beyond this
+MAX_OPEN_COLLECTIONS = int(os.getenv("MINDMATE_MAX_OPEN_COLLECTIONS", "64"))
+
+
+def chunk_hash(text: str) -> str:
+    """
+    Stable content hash used to recognise identical chunks.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _chunk_metadata(
+    metadata: Dict[str, Any], index: int, hash_: str, page: int | None
+) -> Dict[str, Any]:
+    meta = metadata | {"chunk_id": index, "chunk_hash": hash_}
+    if page is not None:
+        meta["page"] = page
+    return meta
+
+
+_embedding_model: Embeddings | None = None
+
+
+def get_embedding_model() -> Embeddings:
+    """
+    The process-wide embedding model, loaded on first use (or ahead of
+    time by preload_embedding_model). With MINDMATE_EMBEDDING_SOCKET set
+    this is a client for the embedding server instead.
+    """
+    global _embedding_model
+    if _embedding_model is None:
+        if EMBEDDING_SOCKET:
+            _embedding_model = SocketEmbeddings(EMBEDDING_SOCKET)
+        else:
+            _embedding_model = load_embedding_model()
+    return _embedding_model
+
+
+def load_embedding_model() -> Embeddings:
+    """
+    Load the local SentenceTransformer model (reads the weights from disk).
+    """
+    return SentenceTransformerEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+
+
+def preload_embedding_model() -> float:
+    """
+    Load the embedding model now and return the seconds it took.
+
+    Called from gunicorn.conf.py in the master process, so forked workers
+    share the weights copy-on-write. No inference runs here: torch thread
+    pools started before a fork can deadlock the children.
+    """
+    start = time.perf_counter()
+    get_embedding_model()
+    return time.perf_counter() - start
+
+
+class _LRUCache:
+    """
+    Dict-like name -> object map holding at most `max_size` entries.
+    The least recently used entry is evicted first and handed to
+    `on_evict(name, value)`.
+    """
+
+    def __init__(self, max_size: int, on_evict: Callable[[str, Any], None] | None = None):
+        self.max_size = max(1, max_size)
+        self.on_evict = on_evict
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            value = self._entries.get(name)
+            if value is not None:
+                self._entries.move_to_end(name)
+            return value
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        evicted = []
+        with self._lock:
+            self._entries[name] = value
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False))
+        if self.on_evict is not None:
+            for evicted_name, evicted_value in evicted:
+                self.on_evict(evicted_name, evicted_value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def collection_name_for(user_id: int | None) -> str:
+    if user_id is None:
+        return SHARED_COLLECTION_NAME
+    return f"mindmate_user_{user_id}"
 
 
 class MindMateVectorStore:
@@ -17,20 +150,84 @@ class MindMateVectorStore:
       - creating the store
       - adding documents
       - running similarity search
+
+    Every user gets their own Chroma collection, so a search only ever
+    touches the caller's documents and its cost doesn't grow with the
+    total number of users.
+
+    Searches are answered by a SearchBackend chosen per collection size:
+    small collections use an exact NumPy index (see backends.py), larger
+    ones go through Chroma. With hybrid search on, those results are fused
+    with BM25 keyword matches (see keyword_index.py).
     """
 
-    def __init__(self, persist_directory: str | None = None):
+    def __init__(
+        self,
+        persist_directory: str | None = None,
+        batch_size: int | None = None,
+        num_workers: int | None = None,
+        embedding_function: Embeddings | None = None,
+        numpy_max_vectors: int | None = None,
+        hybrid: bool | None = None,
+        query_batch_window_ms: float | None = None,
+        query_batch_size: int | None = None,
+        max_open_collections: int | None = None,
+    ):
         if persist_directory is None:
             persist_directory = str(VECTOR_STORE_DIR)
+        self.persist_directory = persist_directory
 
-        # Local embedding model, no API key needed
-        self.embedding_model = SentenceTransformerEmbeddings(
-            model_name="all-MiniLM-L6-v2"
+        # Local embedding model, no API key needed, shared by every store
+        # in the process (benchmarks can pass a cheaper embedding_function)
+        base_model = embedding_function or get_embedding_model()
+
+        # Vectors are cached on disk by (model, text hash), so identical
+        # chunks and repeated queries are never embedded twice
+        self.embedding_cache = EmbeddingCache(
+            Path(persist_directory) / "embedding_cache.sqlite3"
+        )
+        self.embedding_model = CachedEmbeddings(
+            base_model, self.embedding_cache, EMBEDDING_MODEL_NAME
+        )
+
+        # Concurrent searches embed their queries in micro-batches
+        # (see query_coalescer.py); cached queries never reach the model
+        self.query_embedder = QueryCoalescer(
+            self.embedding_model, query_batch_window_ms, query_batch_size
         )
 
-        self.db = Chroma(
-            persist_directory=persist_directory,
-            embedding_function=self.embedding_model,
+        # Batched (optionally multi-process) embedding for ingestion
+        self.embedder = BatchedEmbedder(
+            embedding_function=base_model,
+            model_name=EMBEDDING_MODEL_NAME,
+            batch_size=batch_size,
+            num_workers=num_workers,
+            cache=self.embedding_cache,
+        )
+
+        # Per-collection state is opened lazily and only kept for the
+        # most recently used collections, so a worker serving many users
+        # doesn't accumulate file handles and loaded indexes
+        if max_open_collections is None:
+            max_open_collections = MAX_OPEN_COLLECTIONS
+
+        # Chroma wrappers per collection
+        self._collections = _LRUCache(max_open_collections)
+
+        # Exact NumPy indexes for small collections
+        if numpy_max_vectors is None:
+            numpy_max_vectors = NUMPY_BACKEND_MAX_VECTORS
+        self.numpy_max_vectors = numpy_max_vectors
+        self._checked_collections: set[str] = set()
+        self._numpy_indexes = _LRUCache(
+            max_open_collections,
+            on_evict=lambda name, _: self._checked_collections.discard(name),
+        )
+
+        # BM25 keyword indexes, one per collection
+        self.hybrid = HYBRID_SEARCH if hybrid is None else hybrid
+        self._keyword_indexes = _LRUCache(
+            max_open_collections, on_evict=lambda _, index: index.close()
         )
 
         # Text splitter for chunking documents
@@ -39,33 +236,296 @@ class MindMateVectorStore:
             chunk_overlap=100,
         )
 
-    def add_document(self, text: str, metadata: Dict[str, Any]) -> int:
+    def get_db(self, user_id: int | None = None) -> Chroma:
         """
-        Split the text into chunks, embed them, and store in Chroma.
-        Returns number of chunks added.
+        Return the Chroma collection holding `user_id`'s documents.
+        """
+        name = collection_name_for(user_id)
+        db = self._collections.get(name)
+        if db is None:
+            db = Chroma(
+                collection_name=name,
+                persist_directory=self.persist_directory,
+                embedding_function=self.embedding_model,
+            )
+            self._collections[name] = db
+        return db
+
+    def add_document(
+        self,
+        text: str,
+        metadata: Dict[str, Any],
+        progress_callback: Callable[[int, int], None] | None = None,
+        user_id: int | None = None,
+    ) -> int:
+        """
+        Split the text into chunks, embed them in batches, and store in Chroma.
+        Each batch is written as soon as it is embedded, so large documents
+        never hold every vector in memory at once.
+
+        Every chunk is stored with a content hash, which makes indexing
+        incremental:
+          - re-indexing the same source keeps unchanged chunks, deletes
+            chunks that disappeared and only embeds the new ones
+          - chunks identical to ones already stored for another document
+            reuse the existing vector instead of being embedded again
+
+        If given, progress_callback(chunks_embedded, chunks_total) is called
+        after each batch.
+        Returns number of chunks in the document.
         """
         chunks = self.splitter.split_text(text)
-        metadatas = [metadata | {"chunk_id": i} for i in range(len(chunks))]
+        return self._add_chunks(
+            ((c, None) for c in chunks), len(chunks), metadata, progress_callback, user_id
+        )
+
+    def add_pages(
+        self,
+        pages: Iterable[Tuple[int | None, str]],
+        metadata: Dict[str, Any],
+        progress_callback: Callable[[int, int], None] | None = None,
+        user_id: int | None = None,
+    ) -> int:
+        """
+        Like add_document, but for (page_number, text) pairs such as
+        document_loader.iter_pdf_pages yields (page_number is None for
+        sources without pages). Pages are split and written as they arrive,
+        in windows of INDEX_WINDOW_CHUNKS, so memory doesn't grow with the
+        document; every chunk records its page in its metadata.
+
+        The total isn't known up front, so progress_callback gets the
+        number of chunks seen so far as chunks_total.
+        """
+        chunks = (
+            (chunk, page_num)
+            for page_num, text in pages
+            for chunk in self.splitter.split_text(text)
+        )
+        return self._add_chunks(chunks, None, metadata, progress_callback, user_id)
+
+    def _add_chunks(
+        self,
+        chunks: Iterable[Tuple[str, int | None]],
+        total: int | None,
+        metadata: Dict[str, Any],
+        progress_callback: Callable[[int, int], None] | None,
+        user_id: int | None,
+    ) -> int:
+        db = self.get_db(user_id)
+        collection = db._collection
+        keywords = self.get_keyword_index(user_id)
+        existing = self._existing_chunk_ids(collection, metadata.get("source"))
+
+        seen = 0
+        done = 0
+
+        def report():
+            if progress_callback is not None:
+                progress_callback(done, seen if total is None else total)
+
+        indexed = enumerate(chunks)
+        while window := list(islice(indexed, INDEX_WINDOW_CHUNKS)):
+            seen += len(window)
+            texts = [text for _, (text, _) in window]
+            hashes = [chunk_hash(text) for text in texts]
+            metadatas = [
+                _chunk_metadata(metadata, i, h, page)
+                for (i, (_, page)), h in zip(window, hashes)
+            ]
+
+            # 1) Chunks this source already has: keep them
+            keep_ids = []
+            keep_metadatas = []
+            pending = []
+            for j, h in enumerate(hashes):
+                ids = existing.get(h)
+                if ids:
+                    keep_ids.append(ids.pop())
+                    keep_metadatas.append(metadatas[j])
+                else:
+                    pending.append(j)
+            if keep_ids:
+                # chunk positions (and title) may have changed
+                collection.update(ids=keep_ids, metadatas=keep_metadatas)
+                keywords.update_metadata(keep_ids, keep_metadatas)
+                done += len(keep_ids)
+                report()
+
+            # 2) Reuse vectors of identical chunks stored for other documents
+            known = self._lookup_embeddings(collection, [hashes[j] for j in pending])
+            reused = [j for j in pending if hashes[j] in known]
+            to_embed = [j for j in pending if hashes[j] not in known]
+            if reused:
+                self._write_chunks(
+                    collection,
+                    keywords,
+                    [texts[j] for j in reused],
+                    [known[hashes[j]] for j in reused],
+                    [metadatas[j] for j in reused],
+                )
+                done += len(reused)
+                report()
+
+            # 3) Embed whatever is genuinely new
+            offset = 0
+            for batch, vectors in self.embedder.embed_stream(texts[j] for j in to_embed):
+                indices = to_embed[offset:offset + len(batch)]
+                self._write_chunks(
+                    collection, keywords, batch, vectors, [metadatas[j] for j in indices]
+                )
+                offset += len(batch)
+                done += len(batch)
+                report()
+
+        # whatever wasn't matched has disappeared from the source
+        stale_ids = [chunk_id for ids in existing.values() for chunk_id in ids]
+        if stale_ids:
+            collection.delete(ids=stale_ids)
+            keywords.delete(stale_ids)
+
+        db.persist()  # save to disk
+        self._sync_numpy_index(user_id)
+
+        return seen
+
+    def delete_source(self, source: str, user_id: int | None = None) -> int:
+        """
+        Remove every chunk stored under `source` from a user's collection
+        and return how many were removed.
+        """
+        db = self.get_db(user_id)
+        chunk_ids = [
+            chunk_id
+            for ids in self._existing_chunk_ids(db._collection, source).values()
+            for chunk_id in ids
+        ]
+        if chunk_ids:
+            db._collection.delete(ids=chunk_ids)
+            self.get_keyword_index(user_id).delete(chunk_ids)
+            db.persist()
+            self._sync_numpy_index(user_id)
+        return len(chunk_ids)
+
+    def _numpy_index(self, user_id: int | None) -> NumpyBackend:
+        name = collection_name_for(user_id)
+        index = self._numpy_indexes.get(name)
+        if index is None:
+            index = NumpyBackend(Path(self.persist_directory) / "numpy" / name)
+            self._numpy_indexes[name] = index
+        return index
+
+    def _sync_numpy_index(self, user_id: int | None) -> None:
+        """
+        Rebuild the NumPy index after a write, or drop it once the
+        collection has outgrown it.
+        """
+        index = self._numpy_index(user_id)
+        collection = self.get_db(user_id)._collection
+        if collection.count() <= self.numpy_max_vectors:
+            index.export_from(collection)
+        else:
+            index.remove()
+
+    def get_keyword_index(self, user_id: int | None = None) -> KeywordIndex:
+        """
+        Return the BM25 index for a user's collection, building it from
+        Chroma the first time if the collection predates keyword search.
+        """
+        name = collection_name_for(user_id)
+        index = self._keyword_indexes.get(name)
+        if index is None:
+            index = KeywordIndex(Path(self.persist_directory) / "bm25" / f"{name}.sqlite3")
+            if index.count() == 0:
+                collection = self.get_db(user_id)._collection
+                if collection.count() > 0:
+                    index.rebuild_from(collection)
+            self._keyword_indexes[name] = index
+        return index
+
+    def get_backend(self, user_id: int | None = None) -> SearchBackend:
+        """
+        Pick the search engine for a user's collection.
+        """
+        index = self._numpy_index(user_id)
+        if not index.available():
+            # Collections written before NumPy indexes existed get one on
+            # first use, as long as they're small enough
+            name = collection_name_for(user_id)
+            if name not in self._checked_collections:
+                self._checked_collections.add(name)
+                self._sync_numpy_index(user_id)
+
+        if index.available():
+            return index
+        return ChromaBackend(self.get_db(user_id))
+
+    def _write_chunks(
+        self,
+        collection,
+        keywords: KeywordIndex,
+        documents: List[str],
+        vectors: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+    ) -> None:
+        ids = [str(uuid.uuid4()) for _ in documents]
+        collection.add(
+            ids=ids,
+            embeddings=[list(v) for v in vectors],
+            metadatas=metadatas,
+            documents=documents,
+        )
+        keywords.add(ids, documents, metadatas)
 
-        self.db.add_texts(texts=chunks, metadatas=metadatas)
-        self.db.persist()  # save to disk
+    def _existing_chunk_ids(self, collection, source: str | None) -> Dict[str, List[str]]:
+        """
+        Map chunk hash -> Chroma ids for everything stored under `source`.
+        """
+        if not source:
+            return {}
 
-        return len(chunks)
+        rows = collection.get(where={"source": source}, include=["metadatas"])
+        by_hash: Dict[str, List[str]] = {}
+        for chunk_id, meta in zip(rows["ids"], rows["metadatas"]):
+            by_hash.setdefault((meta or {}).get("chunk_hash", ""), []).append(chunk_id)
+        return by_hash
 
-    def search(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
+    def _lookup_embeddings(self, collection, hashes: List[str]) -> Dict[str, List[float]]:
         """
-        Run similarity search and return top-k chunks with metadata.
+        Fetch stored vectors for any of the given chunk hashes.
         """
-        docs = self.db.similarity_search(query, k=k)
-        results = []
-        for d in docs:
-            results.append(
-                {
-                    "content": d.page_content,
-                    "metadata": d.metadata,
-                }
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), HASH_LOOKUP_BATCH):
+            batch = unique[start:start + HASH_LOOKUP_BATCH]
+            rows = collection.get(
+                where={"chunk_hash": {"$in": batch}},
+                include=["embeddings", "metadatas"],
             )
-        return results
+            for meta, vector in zip(rows["metadatas"], rows["embeddings"]):
+                found[meta["chunk_hash"]] = list(vector)
+        return found
+
+    def search(
+        self, query: str, k: int = 4, user_id: int | None = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run search over one user's documents and return top-k chunks with
+        metadata and a score (cosine similarity, or the reciprocal rank
+        fusion score when hybrid search is on).
+        """
+        query_vector = self.query_embedder.embed_query(query)
+        backend = self.get_backend(user_id)
+        if not self.hybrid:
+            return backend.search(query_vector, k)
+
+        candidates = k * HYBRID_CANDIDATE_FACTOR
+        return reciprocal_rank_fusion(
+            [
+                backend.search(query_vector, candidates),
+                self.get_keyword_index(user_id).search(query, candidates),
+            ],
+            k=k,
+        )
 
 
 # Singleton-like helper
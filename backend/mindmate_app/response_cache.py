@@ -0,0 +1,271 @@
+# mindmate_app/response_cache.py
+"""
+Cache of LLM responses, so resubmitting the same notes or asking the same
+question again doesn't pay for another completion.
+
+Two tiers:
+  - exact: keyed by a hash of (messages, model, temperature)
+  - semantic (optional, MINDMATE_LLM_SEMANTIC_CACHE=1): within the same
+    scope, a new request reuses a cached response when the MiniLM embedding
+    of its text is at least MINDMATE_LLM_SEMANTIC_THRESHOLD cosine-similar
+
+Entries live in SQLite so every web worker shares them. They expire after
+a TTL, and the least recently used ones are evicted past max_entries.
+Only successfully parsed results should be stored, so a malformed reply is
+never replayed.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+LLM_CACHE_PATH = Path(
+    os.getenv("MINDMATE_LLM_CACHE_PATH", "mindmate_vector_store/llm_response_cache.sqlite3")
+)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("MINDMATE_LLM_CACHE_MAX_ENTRIES", "10000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("MINDMATE_LLM_CACHE_TTL", "86400"))
+LLM_SEMANTIC_CACHE = os.getenv("MINDMATE_LLM_SEMANTIC_CACHE", "0") == "1"
+LLM_SEMANTIC_THRESHOLD = float(os.getenv("MINDMATE_LLM_SEMANTIC_THRESHOLD", "0.95"))
+# Fraction of the cap freed in one go once it is exceeded
+EVICT_FRACTION = 0.1
+
+
+def response_key(messages: List[Dict[str, str]], model: str, temperature: float) -> str:
+    payload = json.dumps([messages, model, temperature], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def scope_key(*parts: Any) -> str:
+    """
+    Hash of everything besides the semantic text that the response depends
+    on (model, temperature, retrieved context, ...). Semantic matches are
+    only considered within one scope.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Size-bounded, TTL-limited store of LLM results with per-endpoint
+    hit/miss counters.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_entries: int | None = None,
+        ttl_seconds: float | None = None,
+        embed_fn: Callable[[str], List[float]] | None = None,
+        semantic_threshold: float | None = None,
+    ):
+        if max_entries is None:
+            max_entries = LLM_CACHE_MAX_ENTRIES
+        if ttl_seconds is None:
+            ttl_seconds = LLM_CACHE_TTL_SECONDS
+        if semantic_threshold is None:
+            semantic_threshold = LLM_SEMANTIC_THRESHOLD
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # None disables the semantic tier
+        self.embed_fn = embed_fn
+        self.semantic_threshold = semantic_threshold
+        # endpoint -> {"hits", "semantic_hits", "misses"}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                scope TEXT,
+                vector BLOB,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS llm_response_cache_scope
+                ON llm_response_cache (endpoint, scope);
+            CREATE INDEX IF NOT EXISTS llm_response_cache_last_used
+                ON llm_response_cache (last_used);
+            """
+        )
+        self._conn.commit()
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        counters = self._counters.setdefault(
+            endpoint, {"hits": 0, "semantic_hits": 0, "misses": 0}
+        )
+        counters[outcome] += 1
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(
+        self,
+        endpoint: str,
+        key: str,
+        semantic_text: str | None = None,
+        scope: str | None = None,
+    ) -> Any | None:
+        """
+        Return the cached result for `key`, or for the most similar
+        `semantic_text` in `scope` when the semantic tier is on.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_response_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                self._touch(key, now)
+                self._count(endpoint, "hits")
+                return json.loads(row[0])
+
+        if self.embed_fn is not None and semantic_text and scope:
+            query = self._embed(semantic_text)  # outside the lock: may run the model
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT key, vector, value FROM llm_response_cache "
+                    "WHERE endpoint = ? AND scope = ? AND vector IS NOT NULL "
+                    "AND expires_at > ?",
+                    (endpoint, scope, now),
+                ).fetchall()
+                if rows:
+                    matrix = np.frombuffer(
+                        b"".join(r[1] for r in rows), dtype=np.float32
+                    ).reshape(len(rows), -1)
+                    scores = matrix @ query
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.semantic_threshold:
+                        self._touch(rows[best][0], now)
+                        self._count(endpoint, "semantic_hits")
+                        return json.loads(rows[best][2])
+
+        with self._lock:
+            self._count(endpoint, "misses")
+        return None
+
+    def set(
+        self,
+        endpoint: str,
+        key: str,
+        value: Any,
+        semantic_text: str | None = None,
+        scope: str | None = None,
+    ) -> None:
+        vector = None
+        if self.embed_fn is not None and semantic_text and scope:
+            vector = array("f", self._embed(semantic_text)).tobytes()
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache "
+                "(key, endpoint, scope, vector, value, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    endpoint,
+                    scope,
+                    vector,
+                    json.dumps(value),
+                    now + self.ttl_seconds,
+                    now,
+                ),
+            )
+            self._evict_if_needed(now)
+            self._conn.commit()
+
+    def _touch(self, key: str, now: float) -> None:
+        self._conn.execute(
+            "UPDATE llm_response_cache SET last_used = ? WHERE key = ?", (now, key)
+        )
+        self._conn.commit()
+
+    def _evict_if_needed(self, now: float) -> None:
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM llm_response_cache"
+        ).fetchone()
+        if count <= self.max_entries:
+            return
+
+        self._conn.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM llm_response_cache"
+        ).fetchone()
+        target = int(self.max_entries * (1 - EVICT_FRACTION))
+        if count > target:
+            self._conn.execute(
+                "DELETE FROM llm_response_cache WHERE rowid IN ("
+                "SELECT rowid FROM llm_response_cache ORDER BY last_used LIMIT ?)",
+                (count - target,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_response_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (size,) = self._conn.execute(
+                "SELECT COUNT(*) FROM llm_response_cache"
+            ).fetchone()
+            endpoints = {}
+            for endpoint, c in self._counters.items():
+                lookups = c["hits"] + c["semantic_hits"] + c["misses"]
+                endpoints[endpoint] = {
+                    **c,
+                    "hit_rate": (c["hits"] + c["semantic_hits"]) / lookups if lookups else 0.0,
+                }
+            return {
+                "endpoints": endpoints,
+                "entries": size,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "semantic": self.embed_fn is not None,
+                "semantic_threshold": self.semantic_threshold,
+            }
+
+
+_response_cache_instance: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def _embed_with_vector_store(text: str) -> List[float]:
+    # Same MiniLM model (and embedding cache) used for retrieval
+    from .rag.vector_store import get_vector_store
+
+    return get_vector_store().embedding_model.embed_query(text)
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Process-wide ResponseCache, opened on first use.
+    """
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        with _response_cache_lock:
+            if _response_cache_instance is None:
+                _response_cache_instance = ResponseCache(
+                    LLM_CACHE_PATH,
+                    embed_fn=_embed_with_vector_store if LLM_SEMANTIC_CACHE else None,
+                )
+    return _response_cache_instance
@@ -0,0 +1,102 @@
+# mindmate_app/rollups.py
+"""
+Per-user daily analytics rollup (DailyActivity).
+
+The planner, habit and pomodoro endpoints call the record_* helpers in
+the same transaction as their own write, so analytics can read one small
+row per day instead of scanning tasks and completions. backfill_rollups
+rebuilds the task and habit columns from the raw rows.
+"""
+from datetime import date
+from typing import Dict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import DailyActivity, Habit, HabitCompletion, StudyTask
+
+REBUILT_FIELDS = ["tasks_total", "tasks_done", "habits_completed"]
+
+
+def record_activity(user_id: int, day: date, **deltas: int) -> None:
+    """
+    Add `deltas` (e.g. tasks_done=1) to the user's row for `day`.
+    Uses F() expressions, so concurrent requests don't lose updates.
+    """
+    deltas = {field: n for field, n in deltas.items() if n}
+    if not deltas:
+        return
+
+    updates = {field: F(field) + n for field, n in deltas.items()}
+    if DailyActivity.objects.filter(user_id=user_id, date=day).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            DailyActivity.objects.create(user_id=user_id, date=day, **deltas)
+    except IntegrityError:
+        # another request created the row first
+        DailyActivity.objects.filter(user_id=user_id, date=day).update(**updates)
+
+
+def record_task_change(user_id: int, before: StudyTask | None, after: StudyTask | None) -> None:
+    """
+    Move a task's contribution from its old state to its new one. Pass
+    before=None for a new task and after=None for a deleted one.
+    """
+    if before is not None:
+        record_activity(user_id, before.date, tasks_total=-1, tasks_done=-int(before.done))
+    if after is not None:
+        record_activity(user_id, after.date, tasks_total=1, tasks_done=int(after.done))
+
+
+def record_habit_active_change(habit: Habit, active: bool) -> None:
+    """
+    Add (or remove) a habit's completions when it is (de)activated or
+    deleted; analytics only count active habits.
+    """
+    sign = 1 if active else -1
+    for row in (
+        habit.completions.filter(completed=True).values("date").annotate(n=Count("id"))
+    ):
+        record_activity(habit.user_id, row["date"], habits_completed=sign * row["n"])
+
+
+def backfill_rollups(users=None) -> int:
+    """
+    Recompute the task and habit columns of DailyActivity from StudyTask
+    and HabitCompletion rows. Focus minutes and sessions are kept: there is
+    no per-day history to rebuild them from. Returns rows written.
+    """
+    tasks = StudyTask.objects.all()
+    completions = HabitCompletion.objects.filter(completed=True, habit__is_active=True)
+    rollups = DailyActivity.objects.all()
+    if users is not None:
+        tasks = tasks.filter(user__in=users)
+        completions = completions.filter(habit__user__in=users)
+        rollups = rollups.filter(user__in=users)
+
+    rows: Dict[tuple, Dict[str, int]] = {}
+    for r in tasks.values("user_id", "date").annotate(
+        total=Count("id"), done=Count("id", filter=Q(done=True))
+    ):
+        rows.setdefault((r["user_id"], r["date"]), {}).update(
+            tasks_total=r["total"], tasks_done=r["done"]
+        )
+    for r in completions.values("habit__user_id", "date").annotate(n=Count("id")):
+        rows.setdefault((r["habit__user_id"], r["date"]), {})["habits_completed"] = r["n"]
+
+    with transaction.atomic():
+        existing = {(a.user_id, a.date): a for a in rollups}
+        to_update, to_create = [], []
+        for key, activity in existing.items():
+            values = rows.pop(key, {})
+            for field in REBUILT_FIELDS:
+                setattr(activity, field, values.get(field, 0))
+            to_update.append(activity)
+        for (user_id, day), values in rows.items():
+            to_create.append(DailyActivity(user_id=user_id, date=day, **values))
+
+        DailyActivity.objects.bulk_update(to_update, REBUILT_FIELDS, batch_size=1000)
+        DailyActivity.objects.bulk_create(to_create, batch_size=1000)
+
+    return len(to_update) + len(to_create)
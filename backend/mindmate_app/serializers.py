@@ -2,7 +2,9 @@
 from rest_framework import serializers
 from .models import *
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from datetime import date 
+from .streaks import visible_streak
 
 
 
@@ -61,6 +63,11 @@ class DocumentUploadSerializer(serializers.Serializer):
         allow_null=True,
         help_text="Optional title for the document",
     )
+    document_id = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        help_text="Upload a new version of this document instead of a new document",
+    )
 
     def validate_file(self, value):
         # We mainly handle PDFs for now
@@ -72,13 +79,31 @@ class DocumentUploadSerializer(serializers.Serializer):
 class StudyDocumentSerializer(serializers.ModelSerializer):
     class Meta:
         model = StudyDocument
-        fields = ["id", "title", "source", "uploaded_at", "file"]
+        fields = ["id", "title", "source", "content_hash", "uploaded_at", "file"]
+
+class IngestionJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IngestionJob
+        fields = [
+            "id",
+            "document",
+            "status",
+            "pages_total",
+            "pages_parsed",
+            "chunks_total",
+            "chunks_embedded",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
 
 class ExplainRequestSerializer(serializers.Serializer):
     question = serializers.CharField()
     top_k = serializers.IntegerField(
         required=False, default=4, min_value=1, max_value=10
     )
+    stream = serializers.BooleanField(required=False, default=False)
 
 
 class ExplainResponseSerializer(serializers.Serializer):
@@ -92,6 +117,7 @@ class QuizRequestSerializer(serializers.Serializer):
     num_questions = serializers.IntegerField(
         required=False, default=5, min_value=1, max_value=20
     )
+    stream = serializers.BooleanField(required=False, default=False)
 
 
 class QuizQuestionSerializer(serializers.Serializer):
@@ -138,12 +164,30 @@ class HabitSerializer(serializers.ModelSerializer):
             "completed_today",
             "count_today",
             "streak",
+            "longest_streak",
             "created_at",
         ]
+        read_only_fields = ["longest_streak"]
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Prefetch today's completion for every habit in one query, so a
+        list serializes in a constant number of queries.
+        """
+        return queryset.prefetch_related(
+            Prefetch(
+                "completions",
+                queryset=HabitCompletion.objects.filter(date=date.today()),
+                to_attr="today_completions",
+            )
+        )
 
     def _get_today_completion(self, obj):
-        today = date.today()
-        return obj.completions.filter(date=today).first()
+        # fetched once per habit (or prefetched by setup_eager_loading)
+        if not hasattr(obj, "today_completions"):
+            obj.today_completions = list(obj.completions.filter(date=date.today())[:1])
+        return obj.today_completions[0] if obj.today_completions else None
 
     def get_count_today(self, obj):
         hc = self._get_today_completion(obj)
@@ -155,32 +199,7 @@ class HabitSerializer(serializers.ModelSerializer):
 
     def get_streak(self, obj):
         """Current streak of days where completed_today == True, counting backwards from today."""
-        today = date.today()
-        completions = (
-            obj.completions.filter(date__lte=today)
-            .order_by("-date")
-            .values("date", "completed")
-        )
-        streak = 0
-        expected = today
-
-        for c in completions:
-            if not c["completed"]:
-                if c["date"] == expected:
-                    # same day but not completed → break
-                    break
-                # skip gaps if the last completed day already passed
-                continue
-
-            if c["date"] == expected:
-                streak += 1
-                # move expected to previous day
-                expected = expected.fromordinal(expected.toordinal() - 1)
-            elif c["date"] < expected:
-                # gap before this completion -> streak ends
-                break
-
-        return streak
+        return visible_streak(obj)
 
 
 class PomodoroStatSerializer(serializers.ModelSerializer):
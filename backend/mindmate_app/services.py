@@ -1,21 +1,18 @@
 # mindmate_app/services.py
-import os
+import asyncio
 import json
-from dotenv import load_dotenv
-from typing import List, Dict, Any
-from groq import Groq
+import logging
+import os
+import re
+from typing import Any, Callable, Dict, List
 
-load_dotenv()
+from asgiref.sync import async_to_sync
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-def get_groq_client() -> Groq | None:
-    """
-    Return a Groq client if GROQ_API_KEY is set. Otherwise return None.
-    This prevents import-time crashes on the server.
-    """
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        return None
-    return Groq(api_key=api_key)
+from . import llm
+from .response_cache import get_response_cache, response_key
+
+logger = logging.getLogger(__name__)
 
 FLASHCARD_SYSTEM_PROMPT = """
 You are MindMate AI, an expert study assistant.
@@ -38,7 +35,62 @@ Output ONLY JSON in this format:
 }
 """
 
-def generate_flashcards(topic, notes, difficulty, num_cards):
+FLASHCARD_MODEL = "llama-3.3-70b-versatile"
+SUMMARY_MODEL = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.3
+
+# Requests for more cards than this are split into shards by notes
+# section and generated concurrently.
+FLASHCARD_SHARD_CARDS = int(os.getenv("MINDMATE_FLASHCARD_SHARD_CARDS", "10"))
+FLASHCARD_SHARD_CONCURRENCY = int(os.getenv("MINDMATE_FLASHCARD_SHARD_CONCURRENCY", "4"))
+# Extra attempts for a shard whose reply failed or didn't parse
+FLASHCARD_SHARD_RETRIES = 1
+# Notes per shard (on average) never drops below this, so short notes use
+# fewer shards
+FLASHCARD_MIN_SECTION_CHARS = 1500
+
+# Notes longer than this are summarized map-reduce style: each part on its
+# own (concurrently), then the partial summaries are combined.
+SUMMARY_MAP_REDUCE_CHARS = int(os.getenv("MINDMATE_SUMMARY_MAP_REDUCE_CHARS", "12000"))
+SUMMARY_PART_CHARS = int(os.getenv("MINDMATE_SUMMARY_PART_CHARS", "6000"))
+SUMMARY_PART_OVERLAP = 200
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("MINDMATE_SUMMARY_MAP_CONCURRENCY", "4"))
+# Reduce passes over partial summaries before giving up on shrinking them
+SUMMARY_MAX_DEPTH = 3
+
+SUMMARY_REDUCE_SYSTEM_PROMPT = """
+You are MindMate AI, a study summarizer.
+You will be given summaries of consecutive parts of one set of notes.
+Combine them into a single summary of the whole notes, merging repeated
+points and keeping the original order of topics.
+Output ONLY JSON in this format:
+{
+  "summary": "...",
+  "key_points": ["...", "..."]
+}
+"""
+
+
+async def _acached_completion(
+    endpoint: str, messages: List[Dict[str, str]], model: str, parse: Callable
+) -> Any:
+    """
+    Run a completion through the response cache and return the parsed
+    result. Only results that parsed are cached.
+    """
+    cache = get_response_cache()
+    key = response_key(messages, model, TEMPERATURE)
+    cached = await asyncio.to_thread(cache.get, endpoint, key)
+    if cached is not None:
+        return cached
+
+    text = await llm.achat(model=model, messages=messages, temperature=TEMPERATURE)
+    result = parse(text)
+    await asyncio.to_thread(cache.set, endpoint, key, result)
+    return result
+
+
+def _flashcard_messages(topic, notes, difficulty, num_cards) -> List[Dict[str, str]]:
     prompt = f"""
 Create {num_cards} flashcards.
 
@@ -48,43 +100,220 @@ Difficulty: {difficulty}
 Notes:
 \"\"\"{notes}\"\"\"
 """
-    client = get_groq_client()
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": FLASHCARD_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
-    )
+    return [
+        {"role": "system", "content": FLASHCARD_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
 
-    text = completion.choices[0].message.content
 
+def _parse_flashcards(text: str) -> List[Dict[str, Any]]:
     data = json.loads(text)
     return data.get("cards", [])
 
 
-def summarize_notes(notes, focus):
+def _flashcard_shards(notes: str, num_cards: int) -> List[tuple]:
+    """
+    Split a request into (notes section, number of cards) shards: at most
+    ceil(num_cards / FLASHCARD_SHARD_CARDS) consecutive sections, with the
+    cards spread evenly over them.
+    """
+    max_shards = -(-num_cards // FLASHCARD_SHARD_CARDS)
+    if max_shards < 2:
+        return [(notes, num_cards)]
+
+    num_shards = min(max_shards, len(notes) // FLASHCARD_MIN_SECTION_CHARS)
+    if num_shards < 2:
+        return [(notes, num_cards)]
+
+    # Cut small pieces at paragraph/sentence boundaries, then group them
+    # into num_shards consecutive runs of roughly equal length
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=max(200, len(notes) // (num_shards * 4)),
+        chunk_overlap=0,
+    )
+    pieces = splitter.split_text(notes)
+    num_shards = min(num_shards, len(pieces))
+
+    sections: List[str] = []
+    current: List[str] = []
+    done_chars, total_chars = 0, sum(len(p) for p in pieces)
+    for i, piece in enumerate(pieces):
+        current.append(piece)
+        done_chars += len(piece)
+        remaining_pieces = len(pieces) - i - 1
+        remaining_shards = num_shards - len(sections) - 1
+        target = total_chars * (len(sections) + 1) / num_shards
+        if remaining_shards and (done_chars >= target or remaining_pieces == remaining_shards):
+            sections.append("\n".join(current))
+            current = []
+    sections.append("\n".join(current))
+
+    base, extra = divmod(num_cards, num_shards)
+    return [(section, base + (i < extra)) for i, section in enumerate(sections)]
+
+
+def _question_key(card: Dict[str, Any]) -> str:
+    return " ".join(re.findall(r"\w+", str(card.get("question", "")).lower()))
+
+
+def _merge_shard_cards(results: List[List[Dict[str, Any]] | None], num_cards: int):
+    """
+    Concatenate shard results in notes order, dropping repeated questions.
+    Raises if every shard failed.
+    """
+    if all(r is None for r in results):
+        raise ValueError("Flashcard generation failed for every notes section.")
+
+    cards: List[Dict[str, Any]] = []
+    seen = set()
+    for shard_cards in results:
+        for card in shard_cards or []:
+            key = _question_key(card)
+            if key and key not in seen:
+                seen.add(key)
+                cards.append(card)
+    return cards[:num_cards]
+
+
+async def _agenerate_shard(topic, section, difficulty, num_cards):
+    # only this shard is retried when its reply fails or doesn't parse
+    for attempt in range(FLASHCARD_SHARD_RETRIES + 1):
+        try:
+            return await _acached_completion(
+                "flashcards",
+                _flashcard_messages(topic, section, difficulty, num_cards),
+                FLASHCARD_MODEL,
+                _parse_flashcards,
+            )
+        except Exception as e:
+            logger.warning("flashcard shard failed (attempt %d): %s", attempt + 1, e)
+    return None
+
+
+def generate_flashcards(topic, notes, difficulty, num_cards):
+    """
+    Blocking wrapper around generate_flashcards_async (scripts, the shell).
+    """
+    return async_to_sync(generate_flashcards_async)(topic, notes, difficulty, num_cards)
+
+
+async def generate_flashcards_async(topic, notes, difficulty, num_cards):
+    """
+    Generate flashcards from notes. Large requests are sharded by notes
+    section and run concurrently; a shard that still fails after its
+    retries is left out instead of failing the whole set.
+    """
+    shards = _flashcard_shards(notes, num_cards)
+    if len(shards) == 1:
+        return await _acached_completion(
+            "flashcards",
+            _flashcard_messages(topic, notes, difficulty, num_cards),
+            FLASHCARD_MODEL,
+            _parse_flashcards,
+        )
+
+    limiter = asyncio.Semaphore(FLASHCARD_SHARD_CONCURRENCY)
+
+    async def run_shard(section, shard_cards):
+        async with limiter:
+            return await _agenerate_shard(topic, section, difficulty, shard_cards)
+
+    results = await asyncio.gather(*(run_shard(sec, n) for sec, n in shards))
+    return _merge_shard_cards(results, num_cards)
+
+
+def _summary_messages(notes, focus) -> List[Dict[str, str]]:
     prompt = f"""
 Summarize these notes for: {focus or 'general understanding'}
 
 Notes:
 \"\"\"{notes}\"\"\"
 """
-    client = get_groq_client()
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.3,
-    )
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
 
-    text = completion.choices[0].message.content
+
+def _parse_summary(text: str) -> Dict[str, Any]:
     data = json.loads(text)
 
     return {
         "summary": data.get("summary", ""),
         "key_points": data.get("key_points", []),
     }
+
+
+def _split_notes(notes: str) -> List[str]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=SUMMARY_PART_CHARS,
+        chunk_overlap=SUMMARY_PART_OVERLAP,
+    )
+    return splitter.split_text(notes)
+
+
+def _reduce_messages(partials: List[Dict[str, Any]], focus) -> List[Dict[str, str]]:
+    parts = []
+    for i, p in enumerate(partials, start=1):
+        points = "\n".join(f"- {point}" for point in p.get("key_points", []))
+        parts.append(f"Part {i}:\n{p.get('summary', '')}\n{points}")
+    partial_summaries = "\n\n".join(parts)
+
+    prompt = f"""
+Combine these partial summaries for: {focus or 'general understanding'}
+
+{partial_summaries}
+"""
+    return [
+        {"role": "system", "content": SUMMARY_REDUCE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+def _partials_text(partials: List[Dict[str, Any]]) -> str:
+    return "\n\n".join(
+        p.get("summary", "") + "\n" + "\n".join(p.get("key_points", []))
+        for p in partials
+    )
+
+
+def summarize_notes(notes, focus):
+    """
+    Blocking wrapper around summarize_notes_async (scripts, the shell).
+    """
+    return async_to_sync(summarize_notes_async)(notes, focus)
+
+
+async def summarize_notes_async(notes, focus, _depth=0):
+    """
+    Summarize notes in one call, or map-reduce style when they are longer
+    than SUMMARY_MAP_REDUCE_CHARS. Every part summary is cached on its
+    own, so retrying after a failed part only pays for the parts that
+    are still missing.
+    """
+    if len(notes) <= SUMMARY_MAP_REDUCE_CHARS or _depth >= SUMMARY_MAX_DEPTH:
+        return await _acached_completion(
+            "summarize", _summary_messages(notes, focus), SUMMARY_MODEL, _parse_summary
+        )
+
+    parts = _split_notes(notes)
+    limiter = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+    async def summarize_part(part):
+        async with limiter:
+            return await _acached_completion(
+                "summarize_part",
+                _summary_messages(part, focus),
+                SUMMARY_MODEL,
+                _parse_summary,
+            )
+
+    partials = await asyncio.gather(*(summarize_part(p) for p in parts))
+
+    # Too many parts to combine in one prompt: summarize the summaries
+    if len(_partials_text(partials)) > SUMMARY_MAP_REDUCE_CHARS:
+        return await summarize_notes_async(_partials_text(partials), focus, _depth + 1)
+
+    return await _acached_completion(
+        "summarize_reduce", _reduce_messages(partials, focus), SUMMARY_MODEL, _parse_summary
+    )
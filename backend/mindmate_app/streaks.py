@@ -0,0 +1,123 @@
+# mindmate_app/streaks.py
+"""
+Denormalized habit streaks.
+
+Every Habit stores the run of consecutive completed days that ends at
+last_completed_date (current_streak) and the best run so far
+(longest_streak). They are updated when a day's completion flips, so
+reading a streak needs no query. rebuild_streaks recomputes them from the
+HabitCompletion rows (used by the rebuild_habit_streaks command and the
+migration that added the fields).
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, Tuple
+
+from django.db import transaction
+
+from .models import Habit, HabitCompletion
+
+STREAK_FIELDS = ["current_streak", "longest_streak", "last_completed_date"]
+
+
+def visible_streak(habit: Habit, today: date | None = None) -> int:
+    """
+    Streak as shown to users: consecutive completed days ending today,
+    so 0 until today's completion is done.
+    """
+    today = today or date.today()
+    return habit.current_streak if habit.last_completed_date == today else 0
+
+
+def compute_streaks(completed_dates: Iterable[date]) -> Tuple[int, int, date | None]:
+    """
+    (current_streak, longest_streak, last_completed_date) from the dates a
+    habit was completed on, in ascending order.
+    """
+    current = longest = 0
+    last = None
+    for d in completed_dates:
+        if last is not None and d == last:
+            continue
+        current = current + 1 if last is not None and d == last + timedelta(days=1) else 1
+        longest = max(longest, current)
+        last = d
+    return current, longest, last
+
+
+def _apply(habit: Habit, completed_dates: Iterable[date]) -> None:
+    habit.current_streak, habit.longest_streak, habit.last_completed_date = (
+        compute_streaks(completed_dates)
+    )
+
+
+def record_completion_change(habit: Habit, day: date, completed: bool) -> None:
+    """
+    Update the stored streak after `day` became completed / not completed.
+    Call inside the transaction that saved the HabitCompletion.
+    """
+    if completed:
+        if habit.last_completed_date == day:
+            return
+        if habit.last_completed_date == day - timedelta(days=1):
+            habit.current_streak += 1
+        elif habit.last_completed_date is None or habit.last_completed_date < day:
+            habit.current_streak = 1
+        else:
+            # a day before the latest completion: the runs may have merged
+            _apply(habit, _completed_dates(habit))
+            habit.save(update_fields=STREAK_FIELDS)
+            return
+        habit.last_completed_date = day
+        habit.longest_streak = max(habit.longest_streak, habit.current_streak)
+    else:
+        if (
+            habit.last_completed_date != day
+            or habit.longest_streak == habit.current_streak
+            or habit.current_streak == 1
+        ):
+            # undoing an older day, maybe the only longest run, or a one-day
+            # run (an earlier run becomes the latest): recount
+            _apply(habit, _completed_dates(habit))
+            habit.save(update_fields=STREAK_FIELDS)
+            return
+        # the run now ends the day before
+        habit.current_streak -= 1
+        habit.last_completed_date = day - timedelta(days=1)
+
+    habit.save(update_fields=STREAK_FIELDS)
+
+
+def _completed_dates(habit: Habit) -> List[date]:
+    return list(
+        habit.completions.filter(completed=True).order_by("date").values_list("date", flat=True)
+    )
+
+
+def rebuild_streaks(habits=None, batch_size: int = 1000) -> int:
+    """
+    Recompute the stored streaks of `habits` (default: all) from their
+    completion rows. Returns the number of habits updated.
+    """
+    if habits is None:
+        habits = Habit.objects.all()
+
+    updated = 0
+    habit_ids = list(habits.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(habit_ids), batch_size):
+        ids = habit_ids[start:start + batch_size]
+        dates_by_habit = {pk: [] for pk in ids}
+        for habit_id, day in (
+            HabitCompletion.objects.filter(habit_id__in=ids, completed=True)
+            .order_by("habit_id", "date")
+            .values_list("habit_id", "date")
+        ):
+            dates_by_habit[habit_id].append(day)
+
+        batch = list(Habit.objects.filter(pk__in=ids))
+        for habit in batch:
+            _apply(habit, dates_by_habit[habit.pk])
+        with transaction.atomic():
+            Habit.objects.bulk_update(batch, STREAK_FIELDS)
+        updated += len(batch)
+
+    return updated
@@ -1,3 +1,636 @@
-from django.test import TestCase
+import io
+import itertools
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from .flashcard_import import FlashcardImportError, iter_rows
+from .ingestion import (
+    MAX_JOB_ATTEMPTS,
+    STALE_JOB_SECONDS,
+    claim_next_job,
+    is_retryable,
+    latest_job,
+    run_worker,
+)
+from .models import (
+    DailyActivity,
+    Flashcard,
+    Habit,
+    HabitCompletion,
+    IngestionJob,
+    PomodoroStat,
+    StudyDocument,
+    StudyTask,
+)
+from .rag.context_packing import _merge_text, pack_chunks
+from .rag.embedding_cache import EmbeddingCache
+from .rag.query_cache import IndexGeneration, QueryCache
+from .rollups import backfill_rollups
+from .streaks import compute_streaks, rebuild_streaks
+from .views import HabitToggleTodayView
+
+
+START_DAY = date(2026, 3, 2)
+
+
+class _FixedDate(date):
+    """date whose today() is whatever the test sets."""
+
+    fixed_today = START_DAY
+
+    @classmethod
+    def today(cls):
+        return cls.fixed_today
+
+
+def on_day(offset: int):
+    """
+    Make the views see START_DAY + offset days as today.
+    """
+    _FixedDate.fixed_today = START_DAY + timedelta(days=offset)
+    return mock.patch("mindmate_app.views.date", _FixedDate)
+
+
+class HabitListQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("student", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _create_habits(self, n):
+        today = date.today()
+        habits = Habit.objects.bulk_create(
+            Habit(user=self.user, title=f"Habit {i}", target_per_day=2) for i in range(n)
+        )
+        completions = []
+        for i, habit in enumerate(habits):
+            # a 3-day run ending today on even habits, half-done today on odd ones
+            if i % 2 == 0:
+                completions += [
+                    HabitCompletion(habit=habit, date=today - timedelta(days=d), count=2, completed=True)
+                    for d in range(3)
+                ]
+            else:
+                completions.append(HabitCompletion(habit=habit, date=today, count=1, completed=False))
+        HabitCompletion.objects.bulk_create(completions)
+        rebuild_streaks(Habit.objects.filter(user=self.user))
+        return habits
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/habits/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(ctx)
+
+    def test_query_count_does_not_grow_with_habits(self):
+        self._create_habits(1)
+        _, queries_for_one = self._list_queries()
+
+        self._create_habits(99)
+        data, queries_for_hundred = self._list_queries()
+
+        self.assertEqual(len(data), 100)
+        self.assertEqual(queries_for_hundred, queries_for_one)
+        self.assertLessEqual(queries_for_hundred, 2)
+
+    def test_list_reports_today_and_streaks(self):
+        self._create_habits(4)
+        data, _ = self._list_queries()
+
+        done, partial = data[0], data[1]
+        self.assertEqual(
+            (done["count_today"], done["completed_today"], done["streak"], done["longest_streak"]),
+            (2, True, 3, 3),
+        )
+        self.assertEqual(
+            (partial["count_today"], partial["completed_today"], partial["streak"]),
+            (1, False, 0),
+        )
+
+
+class LazyImportTests(TestCase):
+    def test_views_do_not_import_the_rag_stack(self):
+        # a fresh interpreter (inheriting DJANGO_SETTINGS_MODULE): this one
+        # has already imported everything
+        script = (
+            "import sys, django; django.setup(); import mindmate_app.urls; "
+            "print(sorted({m.split('.')[0] for m in sys.modules} "
+            "& {'chromadb', 'groq', 'langchain_core', 'numpy', 'pypdf'}))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+
+class StaleIngestionJobTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("student", password="secret123")
+        self.doc = StudyDocument.objects.create(user=user, title="notes", file="notes.txt")
+
+    def _running_job(self, seconds_since_heartbeat, attempts=1):
+        beat = timezone.now() - timedelta(seconds=seconds_since_heartbeat)
+        return IngestionJob.objects.create(
+            document=self.doc,
+            content_type="text/plain",
+            status=IngestionJob.STATUS_RUNNING,
+            attempts=attempts,
+            started_at=beat,
+            heartbeat_at=beat,
+        )
+
+    def test_live_job_is_left_alone(self):
+        job = self._running_job(5)
+        self.assertIsNone(claim_next_job())
+        self.assertFalse(is_retryable(job))
+
+    def test_dead_worker_job_is_reclaimed(self):
+        job = self._running_job(STALE_JOB_SECONDS + 5)
+        self.assertTrue(is_retryable(job))
+
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, IngestionJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 2)
+        self.assertFalse(is_retryable(claimed))
+
+    def test_job_fails_after_max_attempts(self):
+        job = self._running_job(STALE_JOB_SECONDS + 5, attempts=MAX_JOB_ATTEMPTS)
+        self.assertIsNone(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestionJob.STATUS_FAILED)
+
+    def test_worker_drains_the_queue(self):
+        jobs = [
+            IngestionJob.objects.create(document=self.doc, content_type="text/plain")
+            for _ in range(2)
+        ]
+
+        def finish(job):
+            IngestionJob.objects.filter(pk=job.pk).update(status=IngestionJob.STATUS_DONE)
+
+        with mock.patch("mindmate_app.ingestion.run_job", side_effect=finish) as run_job:
+            run_worker(once=True)
+        self.assertEqual([c.args[0].pk for c in run_job.call_args_list], [j.pk for j in jobs])
+        self.assertFalse(IngestionJob.objects.exclude(status=IngestionJob.STATUS_DONE).exists())
+
+
+class ContextPackingTests(SimpleTestCase):
+    def _chunk(self, chunk_id, content, page=None):
+        meta = {"source": "document:1", "title": "Notes", "chunk_id": chunk_id, "page": page}
+        return {"content": content, "metadata": meta, "score": 1.0 - chunk_id / 10}
+
+    def test_merge_drops_the_splitter_overlap(self):
+        overlap = "eigenvectors keep their direction"
+        self.assertEqual(
+            _merge_text("Under a linear map, " + overlap, overlap + " when scaled."),
+            "Under a linear map, " + overlap + " when scaled.",
+        )
+
+    def test_short_coincidental_match_is_not_an_overlap(self):
+        self.assertEqual(_merge_text("the mass", "sample text"), "the mass sample text")
+
+    def test_neighbours_on_different_pages_stay_apart(self):
+        packed = pack_chunks(
+            [self._chunk(0, "end of page one", page=1), self._chunk(1, "start of page two", page=2)],
+            token_budget=1000,
+        )
+        self.assertEqual([p["chunk_ids"] for p in packed["passages"]], [[0], [1]])
+        self.assertIn("Page 2, Chunk 1]\nstart of page two", packed["text"])
+
+
+class FlashcardImportTests(TestCase):
+    def _json_rows(self, data: bytes, read_size=3):
+        # tiny reads so elements, escapes and multi-byte characters are
+        # split across read boundaries
+        with mock.patch("mindmate_app.flashcard_import.JSON_READ_SIZE", read_size):
+            return list(iter_rows(io.BytesIO(data), "json"))
+
+    def test_json_array_split_across_reads(self):
+        data = (
+            '\ufeff[ {"question": "Quelle est la d\u00e9riv\u00e9e de x\u00b2 ?", "answer": "2x"},\n'
+            '{"question": "Say \\"hi\\" \U0001f600", "answer": "[ok]", "tag": "a,b"} ]'
+        ).encode()
+        for read_size in (1, 2, 3, 7, 64 * 1024):
+            rows = self._json_rows(data, read_size)
+            self.assertEqual(
+                [r["question"] for r in rows],
+                ["Quelle est la d\u00e9riv\u00e9e de x\u00b2 ?", 'Say "hi" \U0001f600'],
+            )
+
+    def test_json_array_bad_input(self):
+        for data in (
+            b'[{"question": "q", "answer": "a"}, {"question": "q2"',
+            b'[{"question": "q", "answer": "a"} {"question": }]',
+            b'{"question": "q", "answer": "a"}',
+            b"[1, 2]",
+            b"",
+        ):
+            with self.subTest(data=data), self.assertRaises(FlashcardImportError):
+                self._json_rows(data)
+
+    def test_undecodable_files_are_rejected(self):
+        user = User.objects.create_user("student", password="secret123")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for name, data in (
+            ("cards.json", b"\xff\xfe[]"),
+            ("cards.csv", "question,answer\ncaf\u00e9,cr\u00e8me\n".encode("latin-1")),
+            # past csv.field_size_limit()
+            ("cards.csv", b"question,answer\n" + b"x" * 200_000 + b",a\n"),
+        ):
+            upload = SimpleUploadedFile(name, data)
+            response = client.post("/api/flashcards/import/", {"file": upload}, format="multipart")
+            self.assertEqual(response.status_code, 400, (name, data, response.content))
+        self.assertEqual(Flashcard.objects.count(), 0)
+
+    def test_overlong_topic_or_tag_is_rejected(self):
+        user = User.objects.create_user("student", password="secret123")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for column, length in (("topic", 256), ("tag", 101)):
+            data = f"question,answer,{column}\nq1,a1,ok\nq2,a2,{'x' * length}\n".encode()
+            upload = SimpleUploadedFile("cards.csv", data)
+            response = client.post("/api/flashcards/import/", {"file": upload}, format="multipart")
+            self.assertEqual(response.status_code, 400, column)
+            self.assertIn(f"Row 2: {column}", response.data["detail"])
+        self.assertEqual(Flashcard.objects.count(), 0)
+
+    def test_utf16_csv_is_imported(self):
+        data = "question,answer\nd\u00e9riv\u00e9e,2x\n".encode("utf-16")
+        rows = list(iter_rows(io.BytesIO(data), "csv"))
+        self.assertEqual(rows, [{"question": "d\u00e9riv\u00e9e", "answer": "2x"}])
+
+
+class IncrementalStreakTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("student", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.habit = Habit.objects.create(user=self.user, title="Read", target_per_day=2)
+
+    def _toggle(self, day):
+        # HabitToggleTodayView has no route, so call it directly
+        request = APIRequestFactory().post("/")
+        force_authenticate(request, self.user)
+        with on_day(day):
+            response = HabitToggleTodayView.as_view()(request, pk=self.habit.pk)
+        self.assertEqual(response.status_code, 200)
+        self._assert_matches_recount()
+
+    def _increment(self, day, delta=1):
+        with on_day(day):
+            response = self.client.post(
+                f"/api/habits/{self.habit.pk}/increment-today/", {"delta": delta}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self._assert_matches_recount()
+
+    def _assert_matches_recount(self):
+        self.habit.refresh_from_db()
+        dates = self.habit.completions.filter(completed=True).order_by("date").values_list(
+            "date", flat=True
+        )
+        self.assertEqual(
+            (self.habit.current_streak, self.habit.longest_streak, self.habit.last_completed_date),
+            compute_streaks(dates),
+        )
+
+    def _stored(self):
+        return self.habit.current_streak, self.habit.longest_streak
+
+    def test_extend_and_undo_today(self):
+        for day in range(3):
+            self._toggle(day)
+        self.assertEqual(self._stored(), (3, 3))
+
+        self._toggle(2)  # undo today
+        self.assertEqual(self._stored(), (2, 2))
+        self.assertEqual(self.habit.last_completed_date, START_DAY + timedelta(days=1))
+
+    def test_undo_the_longest_run(self):
+        for day in (0, 1, 2, 5, 6):
+            self._toggle(day)
+        self.assertEqual(self._stored(), (2, 3))
+
+        self._toggle(2)  # the clock went back: undo the last day of the longest run
+        self._toggle(6)
+        self.assertEqual(self._stored(), (1, 2))
+
+    def test_completing_a_day_before_the_last_completion(self):
+        for day in (0, 1, 3, 4):
+            self._toggle(day)
+        self._toggle(2)  # joins both runs
+        self.assertEqual(self._stored(), (5, 5))
+
+    def test_random_increments_and_toggles(self):
+        rng = random.Random(0)
+        for _ in range(150):
+            day = rng.randrange(8)
+            if rng.random() < 0.5:
+                self._toggle(day)
+            else:
+                self._increment(day, rng.choice((1, 1, -1)))
+
+
+class DailyActivityRollupTests(TestCase):
+    TODAY = 10  # a Thursday
+
+    def setUp(self):
+        self.user = User.objects.create_user("student", password="secret123")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _call(self, method, url, day=TODAY, **data):
+        with on_day(day):
+            response = getattr(self.client, method)(f"/api{url}", data, format="json")
+        self.assertLess(response.status_code, 300, response.content)
+        self._assert_rollup_matches_backfill()
+        return response.json() if response.content else None
+
+    def _toggle_habit(self, habit_id, day):
+        request = APIRequestFactory().post("/")
+        force_authenticate(request, self.user)
+        with on_day(day):
+            HabitToggleTodayView.as_view()(request, pk=habit_id)
+        self._assert_rollup_matches_backfill()
+
+    def _rollup_rows(self):
+        return sorted(
+            DailyActivity.objects.filter(user=self.user)
+            .exclude(tasks_total=0, tasks_done=0, habits_completed=0)
+            .values_list("date", "tasks_total", "tasks_done", "habits_completed")
+        )
+
+    def _assert_rollup_matches_backfill(self):
+        incremental = self._rollup_rows()
+        backfill_rollups()
+        self.assertEqual(incremental, self._rollup_rows())
+
+    def _day(self, offset):
+        return (START_DAY + timedelta(days=offset)).isoformat()
+
+    def test_writes_keep_the_rollup_in_sync(self):
+        # planner: create, update (date and done), toggle, delete
+        a = self._call("post", "/planner/tasks/", title="A", date=self._day(3))
+        b = self._call("post", "/planner/tasks/", title="B", date=self._day(10), done=True)
+        c = self._call("post", "/planner/tasks/", title="C", date=self._day(11))
+        d = self._call("post", "/planner/tasks/", title="D", date=self._day(8))
+        self._call("patch", f"/planner/tasks/{a['id']}/", date=self._day(9), done=True)
+        self._call("post", f"/planner/tasks/{c['id']}/toggle/")
+        self._call("post", f"/planner/tasks/{d['id']}/toggle/")
+        self._call("post", f"/planner/tasks/{d['id']}/toggle/")
+        self._call("delete", f"/planner/tasks/{b['id']}/")
+
+        # habits: increments and toggles over several days, then
+        # deactivate, reactivate and delete
+        h1 = self._call("post", "/habits/", title="Read", target_per_day=1)["id"]
+        h2 = self._call("post", "/habits/", title="Run", target_per_day=2)["id"]
+        h3 = self._call("post", "/habits/", title="Stretch", target_per_day=1)["id"]
+        for day in (8, 9, 10):
+            for habit_id in (h1, h2, h2, h3):
+                self._call("post", f"/habits/{habit_id}/increment-today/", day=day, delta=1)
+        self._call("post", f"/habits/{h2}/increment-today/", day=9, delta=-1)
+        self._toggle_habit(h1, 10)
+        self._toggle_habit(h3, 7)
+        self._call("patch", f"/habits/{h2}/", is_active=False)
+        self._call("patch", f"/habits/{h2}/", is_active=True)
+        self._call("patch", f"/habits/{h1}/", is_active=False)
+        self._call("delete", f"/habits/{h3}/")
+
+        # pomodoro
+        self._call("post", "/pomodoro/stats/", focus_minutes=25)
+        self._call("post", "/pomodoro/stats/", day=9, focus_minutes=50)
+
+        overview = self._call("get", "/analytics/overview/?days=14")
+        self.assertEqual(overview, {**overview, **self._raw_overview(days=14)})
+
+        for days in (3, 7):
+            series = self._call("get", f"/analytics/overview/?days={days}")["series"]
+            self.assertEqual(len(series["tasks_completed"]), days)
+            self.assertEqual(
+                series["tasks_completed_last_7"], overview["series"]["tasks_completed"][-7:]
+            )
+            self.assertEqual(
+                series["habit_completion_last_7"], overview["series"]["habit_completion"][-7:]
+            )
+
+    def _raw_overview(self, days):
+        """
+        The numbers AnalyticsOverviewView computed from the raw rows
+        before the rollup existed.
+        """
+        today = START_DAY + timedelta(days=self.TODAY)
+        week_start = today - timedelta(days=today.weekday())
+        week = [week_start, week_start + timedelta(days=6)]
+        dates = [today - timedelta(days=days - 1 - i) for i in range(days)]
+        tasks = StudyTask.objects.filter(user=self.user)
+        completions = HabitCompletion.objects.filter(
+            habit__user=self.user, habit__is_active=True, completed=True
+        )
+        total_habits = Habit.objects.filter(user=self.user, is_active=True).count()
+        stat = PomodoroStat.objects.get(user=self.user)
+
+        self.assertTrue(tasks.exists() and completions.exists())
+        return {
+            "planner": {
+                "total_tasks": tasks.count(),
+                "completed_this_week": tasks.filter(done=True, date__range=week).count(),
+                "overdue_tasks": tasks.filter(done=False, date__lt=today).count(),
+            },
+            "series": {
+                "tasks_completed_last_7": mock.ANY,
+                "habit_completion_last_7": mock.ANY,
+                "tasks_completed": [
+                    {"date": d.isoformat(), "completed": tasks.filter(done=True, date=d).count()}
+                    for d in dates
+                ],
+                "habit_completion": [
+                    {
+                        "date": d.isoformat(),
+                        "completed": completions.filter(date=d).count(),
+                        "total": total_habits,
+                        "completion_rate": completions.filter(date=d).count() / total_habits,
+                    }
+                    for d in dates
+                ],
+                "focus": [
+                    {
+                        "date": d.isoformat(),
+                        "minutes": {today: 25, today - timedelta(days=1): 50}.get(d, 0),
+                        "sessions": int(d in (today, today - timedelta(days=1))),
+                    }
+                    for d in dates
+                ],
+            },
+            "pomodoro": {
+                "total_focus_minutes": stat.total_focus_minutes,
+                "completed_sessions": stat.completed_sessions,
+            },
+        }
+
+
+class PerUserCollectionTests(TestCase):
+    """
+    Each user's chunks live in their own collection; searches and deletes
+    for one user must never see another's.
+    """
+
+    def setUp(self):
+        from benchmarks.common import HashingEmbeddings
+
+        from .rag.vector_store import MindMateVectorStore
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media = override_settings(MEDIA_ROOT=tmp.name + "/media")
+        self.media.enable()
+        self.addCleanup(self.media.disable)
+
+        self.store = MindMateVectorStore(
+            persist_directory=tmp.name + "/store",
+            embedding_function=HashingEmbeddings(),
+            num_workers=1,
+        )
+        patcher = mock.patch(
+            "mindmate_app.rag.rag_service.get_vector_store", return_value=self.store
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.alice = User.objects.create_user("alice", password="secret123")
+        self.bob = User.objects.create_user("bob", password="secret123")
+
+    def _index(self, text, source, user):
+        user_id = user.id if user else None
+        self.store.add_document(text, {"title": source, "source": source}, user_id=user_id)
+
+    def _sources(self, query, user):
+        results = self.store.search(query, k=10, user_id=user.id if user else None)
+        return {r["metadata"]["source"] for r in results}
+
+    def test_search_and_delete_stay_in_the_callers_collection(self):
+        text = "photosynthesis turns light energy into chemical energy"
+        self._index(text, "document:1", self.alice)
+        self._index(text, "document:2", self.bob)
+        self._index(text, "document:3", None)
+
+        self.assertEqual(self._sources("photosynthesis", self.alice), {"document:1"})
+        self.assertEqual(self._sources("photosynthesis", self.bob), {"document:2"})
+        self.assertEqual(self._sources("photosynthesis", None), {"document:3"})
+
+        # alice can't delete bob's or the shared copy by naming its source
+        self.assertEqual(self.store.delete_source("document:2", user_id=self.alice.id), 0)
+        self.assertEqual(self.store.delete_source("document:3", user_id=self.alice.id), 0)
+        self.assertEqual(self.store.delete_source("document:1", user_id=self.alice.id), 1)
+
+        self.assertEqual(self._sources("photosynthesis", self.alice), set())
+        self.assertEqual(self._sources("photosynthesis", self.bob), {"document:2"})
+        self.assertEqual(self._sources("photosynthesis", None), {"document:3"})
+
+    def test_assign_legacy_documents_moves_chunks_to_the_owner(self):
+        docs = []
+        for text in ("mitochondria produce cellular energy", "the french revolution began"):
+            doc = StudyDocument.objects.create(
+                title=text, file=SimpleUploadedFile("notes.txt", text.encode())
+            )
+            self._index(text, f"document:{doc.pk}", None)
+            docs.append(doc)
+        self._index("mitochondria in bob's notes", "document:99", self.bob)
+        legacy, untouched = docs
+
+        call_command(
+            "assign_legacy_documents", user="alice", document=[legacy.pk], stdout=io.StringIO()
+        )
+        run_worker(once=True)
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.user, self.alice)
+        self.assertEqual(latest_job(legacy).status, IngestionJob.STATUS_DONE)
+        self.assertIsNone(StudyDocument.objects.get(pk=untouched.pk).user)
+
+        self.assertEqual(self._sources("mitochondria", self.alice), {f"document:{legacy.pk}"})
+        self.assertEqual(self._sources("mitochondria", self.bob), {"document:99"})
+        # only the assigned document left the shared collection
+        self.assertEqual(
+            self._sources("mitochondria revolution", None), {f"document:{untouched.pk}"}
+        )
+
+
+class QueryCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.generation = IndexGeneration(tmp.name)
+        self.cache = QueryCache(self.generation)
+
+    def _fill(self, collection):
+        key = ("photosynthesis", 4)
+        generation = self.generation.current(collection)
+        self.cache.set(collection, key, [{"content": collection}], generation)
+        return key
+
+    def test_write_only_invalidates_its_own_collection(self):
+        alice = self._fill("mindmate_user_1")
+        bob = self._fill("mindmate_user_2")
+
+        self.generation.bump("mindmate_user_2")
+
+        self.assertEqual(
+            self.cache.get("mindmate_user_1", alice), [{"content": "mindmate_user_1"}]
+        )
+        self.assertIsNone(self.cache.get("mindmate_user_2", bob))
+        self.assertEqual(self.cache.stats()["invalidations"], 1)
+
+    def test_results_from_before_a_write_are_not_cached_as_current(self):
+        key = ("photosynthesis", 4)
+        generation = self.generation.current("mindmate_user_1")
+        self.generation.bump("mindmate_user_1")  # lands while the search runs
+        self.cache.set("mindmate_user_1", key, [{"content": "stale"}], generation)
+        self.assertIsNone(self.cache.get("mindmate_user_1", key))
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = EmbeddingCache(tmp.name + "/cache.sqlite3", max_entries=3)
+        clock = mock.patch("mindmate_app.rag.embedding_cache.time.time")
+        clock.start().side_effect = itertools.count(1000.0)
+        self.addCleanup(clock.stop)
+
+    def test_hits_do_not_write(self):
+        self.cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+        changes = self.cache._conn.total_changes
+
+        found = self.cache.get_many("m", ["a", "b", "x"])
+        self.assertEqual(found, {"a": [1.0], "b": [2.0]})
+        self.assertEqual(self.cache._conn.total_changes, changes)
+        self.assertFalse(self.cache._conn.in_transaction)
+
+    def test_deferred_hits_still_protect_rows_from_eviction(self):
+        self.cache.put_many("m", ["a", "b", "c"], [[1.0], [2.0], [3.0]])
+        self.cache.get_many("m", ["a"])
+        self.cache.put_many("m", ["d"], [[4.0]])  # over the cap: evicts b and c
+
+        self.assertEqual(set(self.cache.get_many("m", ["a", "b", "c", "d"])), {"a", "d"})
@@ -7,10 +7,13 @@ from . import views
 
 urlpatterns = [
     path("health/", health_view, name="health"),
+    path("debug/cache-stats/", CacheStatsView.as_view(), name="debug-cache-stats"),
     path("auth/register/", views.register_view, name="register"),
     path("flashcards/", FlashcardView.as_view(), name="flashcards"),
+    path("flashcards/import/", FlashcardImportView.as_view(), name="flashcards-import"),
     path("summarize/", SummarizeView.as_view(), name="summarize"),
     path("upload-document/", DocumentUploadView.as_view(), name="upload-document"),
+    path("documents/<int:pk>/status/", DocumentStatusView.as_view(), name="document-status"),
     path("explain/", ExplainView.as_view(), name="explain"),
     path("quiz-me/", QuizMeView.as_view(), name="quiz-me"),
     # Auth
@@ -7,22 +7,87 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics, permissions
 from datetime import date, timedelta
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Case, Count, F, IntegerField, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
 from rest_framework.parsers import MultiPartParser, FormParser
 from .models import *
-from .services import generate_flashcards, summarize_notes
-from django.http import JsonResponse
+from . import ai
+from .async_api import AsyncAPIView
+from asgiref.sync import sync_to_async
+from .ingestion import (
+    UploadLimitHandler,
+    enqueue_document,
+    is_retryable,
+    hash_upload,
+    latest_job,
+    max_upload_bytes,
+)
+from .streaks import record_completion_change
+from .rollups import (
+    record_activity,
+    record_habit_active_change,
+    record_task_change,
+)
+from .flashcard_import import (
+    FlashcardImportError,
+    detect_format,
+    import_flashcards,
+    iter_rows,
+    save_flashcards,
+)
+from django.http import JsonResponse, StreamingHttpResponse
 
 from .serializers import *
-from .rag.document_loader import load_pdf_text
-from .rag.rag_service import *
 
 
+import copy
 import json
+import logging
+import time
+from typing import Dict, List
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def sse_response(events, label):
+    """
+    Wrap the (event, data) pairs of an async iterator from the rag_service
+    *_astream helpers in a Server-Sent Events response.
+
+    Time to first byte (the "sources" event) and time to first token are
+    logged per request and also sent in the final "done" event.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    def format_event(event, data):
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        timings.setdefault("ttfb_ms", elapsed_ms)
+        if event == "token":
+            timings.setdefault("ttft_ms", elapsed_ms)
+        if event == "done":
+            timings["total_ms"] = elapsed_ms
+            data = data | {"timings": timings}
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    async def stream():
+        try:
+            async for event, data in events:
+                yield format_event(event, data)
+        except Exception as e:
+            logger.exception("%s stream failed", label)
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        logger.info("%s stream timings: %s", label, timings)
+
+    body = stream()
+    response = StreamingHttpResponse(body, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
 
 
 
@@ -31,36 +96,40 @@ User = get_user_model()
 @permission_classes([AllowAny])
 def health_view(request):
     return JsonResponse({"status": "ok"})
-class FlashcardView(APIView):
-    def post(self, request):
+
+
+class CacheStatsView(APIView):
+    """
+    Debug counters for the retrieval and LLM response caches (admin only).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(ai.get_cache_stats())
+
+
+class FlashcardView(AsyncAPIView):
+    async def post(self, request):
         serializer = FlashcardRequestSerializer(data=request.data)
         if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
         try:
-            cards_data = generate_flashcards(
+            cards_data = await ai.generate_flashcards_async(
                 topic=data.get("topic"),
                 notes=data["notes"],
                 difficulty=data["difficulty"],
                 num_cards=data["num_cards"],
             )
         except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return JsonResponse({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         # Save to DB (optional)
-        flashcards = []
-        for c in cards_data:
-            fc = Flashcard.objects.create(
-                topic=data.get("topic"),
-                question=c.get("question", ""),
-                answer=c.get("answer", ""),
-                tag=c.get("tag") or None,
-            )
-            flashcards.append(fc)
+        flashcards = await sync_to_async(save_flashcards)(data.get("topic"), cards_data)
 
         response_serializer = FlashcardSerializer(flashcards, many=True)
-        return Response(
+        return JsonResponse(
             {
                 "topic": data.get("topic"),
                 "cards": response_serializer.data,
@@ -69,156 +138,255 @@ class FlashcardView(APIView):
         )
 
 
-class SummarizeView(APIView):
+class FlashcardImportView(APIView):
+    """
+    Bulk import of flashcards from an uploaded .csv (question, answer,
+    optional topic/tag columns), .json (array of cards) or .jsonl file.
+    The file is read incrementally and inserted in batches.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+    permission_classes = [IsAuthenticated]
+
     def post(self, request):
+        upload_file = request.FILES.get("file")
+        if upload_file is None:
+            return Response(
+                {"detail": "No file uploaded."}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            file_format = detect_format(upload_file.name)
+            result = import_flashcards(
+                iter_rows(upload_file, file_format),
+                topic=request.data.get("topic") or None,
+            )
+        except FlashcardImportError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class SummarizeView(AsyncAPIView):
+    async def post(self, request):
         serializer = SummarizeRequestSerializer(data=request.data)
         if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
         try:
-            result = summarize_notes(
+            result = await ai.summarize_notes_async(
                 notes=data["notes"],
                 focus=data.get("focus"),
             )
         except Exception as e:
-            return Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return JsonResponse({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         response_serializer = SummaryResponseSerializer(result)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return JsonResponse(response_serializer.data, status=status.HTTP_200_OK)
+
+
+
+def _upload_too_large(content_type: str | None = None) -> Response:
+    limit_mb = max_upload_bytes(content_type) // (1024 * 1024)
+    return Response(
+        {"detail": f"File too large. The limit is {limit_mb} MB."},
+        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    )
 
 
 class DocumentUploadView(APIView):
     """
-    Handles user document upload, extraction, and indexing into the vector store.
+    Handles user document upload and queues it for extraction and indexing.
+    The heavy work runs in the ingestion worker (see mindmate_app/ingestion.py);
+    poll DocumentStatusView for progress.
+
+    Oversized uploads are refused from the Content-Length header, or while
+    the body streams in, before they are stored (MAX_UPLOAD_MB).
     """
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [IsAuthenticated]
+
     def post(self, request):
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > max_upload_bytes():
+            return _upload_too_large()
+
+        limit_handler = UploadLimitHandler(request)
+        request.upload_handlers.insert(0, limit_handler)
+
         serializer = DocumentUploadSerializer(data=request.data)
+        if limit_handler.exceeded:
+            return _upload_too_large(limit_handler.exceeded)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         upload_file = serializer.validated_data["file"]
         title = serializer.validated_data.get("title") or upload_file.name
+        content_type = upload_file.content_type
 
-        # Save file via model
-        study_doc = StudyDocument.objects.create(
-            title=title,
-            file=upload_file,
-            source="user-upload",
-        )
+        if content_type not in ("application/pdf", "text/plain"):
+            return Response(
+                {"detail": "Unsupported file type."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if upload_file.size > max_upload_bytes(content_type):
+            return _upload_too_large(content_type)
 
-        # Determine file path and type
-        file_path = study_doc.file.path
-        content_type = upload_file.content_type
+        file_hash = hash_upload(upload_file)
 
-        # Extract text either from PDF or plain text
-        try:
-            if content_type == "application/pdf":
-                text = load_pdf_text(file_path)
-            elif content_type == "text/plain":
-                # Read as plain text
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    text = f.read()
-            else:
+        # Identical file already uploaded → nothing to extract or embed
+        user_docs = StudyDocument.objects.filter(user=request.user)
+        duplicate = user_docs.filter(content_hash=file_hash).first()
+        if duplicate is not None:
+            job = latest_job(duplicate)
+            if job is not None and not is_retryable(job):
                 return Response(
-                    {"detail": "Unsupported file type."},
-                    status=status.HTTP_400_BAD_REQUEST,
+                    {
+                        "message": "Document already uploaded.",
+                        "document": StudyDocumentSerializer(duplicate).data,
+                        "job": IngestionJobSerializer(job).data,
+                    },
+                    status=status.HTTP_200_OK,
                 )
-        except Exception as e:
-            # If extraction fails, delete the record to avoid junk
-            study_doc.delete()
-            return Response(
-                {"detail": f"Failed to extract text: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
 
-        if not text.strip():
-            study_doc.delete()
-            return Response(
-                {"detail": "No extractable text found in the document."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        # A new version of an existing document only when the client asks
+        # for one; the indexer then only embeds the chunks that changed.
+        # Otherwise it's a new document (unchanged chunks still come from
+        # the embedding cache).
+        study_doc = duplicate
+        document_id = serializer.validated_data.get("document_id")
+        if study_doc is None and document_id is not None:
+            study_doc = user_docs.filter(pk=document_id).first()
+            if study_doc is None:
+                return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+            # don't swap the file out from under a job that is still using it
+            job = latest_job(study_doc)
+            active = job is not None and job.status != IngestionJob.STATUS_DONE
+            if active and not is_retryable(job):
+                return Response(
+                    {"detail": "This document is still being indexed."},
+                    status=status.HTTP_409_CONFLICT,
+                )
 
-        # Index into vector store
-        try:
-            num_chunks = index_document(
-                text=text,
+        if study_doc is None:
+            study_doc = StudyDocument.objects.create(
+                user=request.user,
                 title=title,
-                source=f"document:{study_doc.id}",
-            )
-        except Exception as e:
-            # If indexing fails, we still keep the document in DB,
-            # but return an error for debugging
-            return Response(
-                {"detail": f"Failed to index document: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                file=upload_file,
+                source="user-upload",
+                content_hash=file_hash,
             )
+        elif study_doc.content_hash != file_hash:
+            study_doc.file.delete(save=False)
+            study_doc.file = upload_file
+            study_doc.content_hash = file_hash
+            study_doc.save()
 
-        study_doc_serializer = StudyDocumentSerializer(study_doc)
+        job = enqueue_document(study_doc, content_type)
 
         return Response(
             {
-                "message": "Document uploaded and indexed successfully.",
-                "document": study_doc_serializer.data,
-                "chunks_indexed": num_chunks,
+                "message": "Document uploaded and queued for indexing.",
+                "document": StudyDocumentSerializer(study_doc).data,
+                "job": IngestionJobSerializer(job).data,
             },
-            status=status.HTTP_201_CREATED,
+            status=status.HTTP_202_ACCEPTED,
         )
 
 
-class ExplainView(APIView):
+class DocumentStatusView(APIView):
+    """
+    Report ingestion progress for a document (latest job).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        study_doc = StudyDocument.objects.filter(pk=pk, user=request.user).first()
+        job = latest_job(study_doc) if study_doc is not None else None
+        if job is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(IngestionJobSerializer(job).data)
+
+
+class ExplainView(AsyncAPIView):
     """
     Use the indexed documents to explain a question.
     Currently uses a simple context-based answer (no LLM).
     """
-    permission_classes = [IsAuthenticated]
-    def post(self, request):
+    login_required = True
+
+    async def post(self, request):
         serializer = ExplainRequestSerializer(data=request.data)
         if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
         question = data["question"]
         top_k = data.get("top_k", 4)
 
+        if data.get("stream"):
+            return sse_response(
+                ai.explain_with_llm_astream(
+                    question=question, k=top_k, user_id=request.user.id
+                ),
+                label="explain",
+            )
+
         try:
-            result = explain_with_llm(question=question, k=top_k)
+            result = await ai.explain_with_llm_async(
+                question=question, k=top_k, user_id=request.user.id
+            )
         except Exception as e:
-            return Response(
+            return JsonResponse(
                 {"detail": f"Failed to generate explanation: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
         response_serializer = ExplainResponseSerializer(result)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return JsonResponse(response_serializer.data, status=status.HTTP_200_OK)
 
 
-class QuizMeView(APIView):
+
+class QuizMeView(AsyncAPIView):
     """
     Generate a simple quiz based on the indexed documents.
     """
-    permission_classes = [IsAuthenticated]
-    def post(self, request):
+    login_required = True
+
+    async def post(self, request):
         serializer = QuizRequestSerializer(data=request.data)
         if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         data = serializer.validated_data
         topic = data["topic"]
         num_questions = data.get("num_questions", 5)
 
+        if data.get("stream"):
+            return sse_response(
+                ai.quiz_with_llm_astream(
+                    topic=topic, num_questions=num_questions, user_id=request.user.id
+                ),
+                label="quiz",
+            )
+
         try:
-            result = quiz_with_llm(topic=topic, num_questions=num_questions)
+            result = await ai.quiz_with_llm_async(
+                topic=topic, num_questions=num_questions, user_id=request.user.id
+            )
         except Exception as e:
-            return Response(
+            return JsonResponse(
                 {"detail": f"Failed to generate quiz: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
         response_serializer = QuizResponseSerializer(result)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return JsonResponse(response_serializer.data, status=status.HTTP_200_OK)
+
 
 
 class RegisterView(APIView):
@@ -390,8 +558,10 @@ class StudyTaskListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         return StudyTask.objects.filter(user=self.request.user)
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        task = serializer.save(user=self.request.user)
+        record_task_change(task.user_id, None, task)
 
 
 class StudyTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -401,6 +571,17 @@ class StudyTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return StudyTask.objects.filter(user=self.request.user)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        before = copy.copy(serializer.instance)
+        task = serializer.save()
+        record_task_change(task.user_id, before, task)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        record_task_change(instance.user_id, instance, None)
+        instance.delete()
+
 
 class StudyTaskToggleDoneView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -411,8 +592,10 @@ class StudyTaskToggleDoneView(APIView):
         except StudyTask.DoesNotExist:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        task.done = not task.done
-        task.save()
+        with transaction.atomic():
+            task.done = not task.done
+            task.save()
+            record_activity(task.user_id, task.date, tasks_done=1 if task.done else -1)
         return Response({"id": task.id, "done": task.done})
 
 
@@ -422,8 +605,10 @@ class HabitListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Habit.objects.filter(user=self.request.user, is_active=True).order_by(
-            "created_at"
+        return HabitSerializer.setup_eager_loading(
+            Habit.objects.filter(user=self.request.user, is_active=True).order_by(
+                "created_at"
+            )
         )
 
     def perform_create(self, serializer):
@@ -435,7 +620,22 @@ class HabitDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Habit.objects.filter(user=self.request.user)
+        return HabitSerializer.setup_eager_loading(
+            Habit.objects.filter(user=self.request.user)
+        )
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        was_active = serializer.instance.is_active
+        habit = serializer.save()
+        if habit.is_active != was_active:
+            record_habit_active_change(habit, habit.is_active)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        if instance.is_active:
+            record_habit_active_change(instance, False)
+        instance.delete()
 
 
 class HabitIncrementTodayView(APIView):
@@ -449,25 +649,35 @@ class HabitIncrementTodayView(APIView):
     def post(self, request, pk):
         delta = int(request.data.get("delta", 1) or 1)
 
-        try:
-            habit = Habit.objects.get(pk=pk, user=request.user)
-        except Habit.DoesNotExist:
-            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
-
         today = date.today()
-        hc, _ = HabitCompletion.objects.get_or_create(
-            habit=habit, date=today, defaults={"count": 0, "completed": False}
-        )
+        with transaction.atomic():
+            try:
+                # lock the habit so concurrent increments update the streak in turn
+                habit = Habit.objects.select_for_update().get(pk=pk, user=request.user)
+            except Habit.DoesNotExist:
+                return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            hc, _ = HabitCompletion.objects.get_or_create(
+                habit=habit, date=today, defaults={"count": 0, "completed": False}
+            )
+            was_completed = hc.completed
+
+            new_count = hc.count + delta
+            if new_count < 0:
+                new_count = 0
+            if new_count > habit.target_per_day:
+                new_count = habit.target_per_day
 
-        new_count = hc.count + delta
-        if new_count < 0:
-            new_count = 0
-        if new_count > habit.target_per_day:
-            new_count = habit.target_per_day
+            hc.count = new_count
+            hc.completed = hc.count >= habit.target_per_day
+            hc.save()
 
-        hc.count = new_count
-        hc.completed = hc.count >= habit.target_per_day
-        hc.save()
+            if hc.completed != was_completed:
+                record_completion_change(habit, today, hc.completed)
+                if habit.is_active:
+                    record_activity(
+                        habit.user_id, today, habits_completed=1 if hc.completed else -1
+                    )
 
         # Return updated habit state (serializer handles completed_today / count_today / streak)
         serializer = HabitSerializer(habit)
@@ -478,19 +688,23 @@ class HabitToggleTodayView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        from datetime import date
-
-        try:
-            habit = Habit.objects.get(pk=pk, user=request.user)
-        except Habit.DoesNotExist:
-            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
-
         today = date.today()
-        hc, _ = HabitCompletion.objects.get_or_create(
-            habit=habit, date=today, defaults={"completed": False}
-        )
-        hc.completed = not hc.completed
-        hc.save()
+        with transaction.atomic():
+            try:
+                habit = Habit.objects.select_for_update().get(pk=pk, user=request.user)
+            except Habit.DoesNotExist:
+                return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+            hc, _ = HabitCompletion.objects.get_or_create(
+                habit=habit, date=today, defaults={"completed": False}
+            )
+            hc.completed = not hc.completed
+            hc.save()
+            record_completion_change(habit, today, hc.completed)
+            if habit.is_active:
+                record_activity(
+                    habit.user_id, today, habits_completed=1 if hc.completed else -1
+                )
         return Response({"id": habit.id, "completed_today": hc.completed})
 
 
@@ -511,147 +725,187 @@ class PomodoroStatView(APIView):
         focus_minutes = int(request.data.get("focus_minutes", 25) or 25)
         if focus_minutes < 0:
             focus_minutes = 0
-        stat, _ = PomodoroStat.objects.get_or_create(
-            user=request.user,
-            defaults={"total_focus_minutes": 0, "completed_sessions": 0},
-        )
-        stat.total_focus_minutes += focus_minutes
-        stat.completed_sessions += 1
-        stat.save()
+        with transaction.atomic():
+            stat, _ = PomodoroStat.objects.get_or_create(
+                user=request.user,
+                defaults={"total_focus_minutes": 0, "completed_sessions": 0},
+            )
+            stat.total_focus_minutes += focus_minutes
+            stat.completed_sessions += 1
+            stat.save()
+            record_activity(
+                request.user.id, date.today(), focus_minutes=focus_minutes, sessions=1
+            )
         serializer = PomodoroStatSerializer(stat)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     
+ANALYTICS_MAX_DAYS = 365
+LEGACY_SERIES_DAYS = 7
+
+
+ROLLUP_SERIES_FIELDS = ["tasks_done", "habits_completed", "focus_minutes", "sessions"]
+
+
+def _daily_rollups(rows, dates: List[date]) -> Dict[date, Dict[str, int]]:
+    by_date = {r["date"]: r for r in rows}
+    empty = dict.fromkeys(ROLLUP_SERIES_FIELDS, 0)
+    return {d: by_date.get(d, empty) for d in dates}
+
+
 class AnalyticsOverviewView(APIView):
     """
-    Returns high-level stats + last 7 days series
-    for planner tasks, habits, and pomodoro.
+    Returns high-level stats + a daily series (last `days` days, default 7,
+    up to 365) for planner tasks, habits, and pomodoro.
+
+    Task, habit and focus numbers come from the DailyActivity rollup
+    (kept up to date by the write endpoints, see rollups.py), so the cost
+    is one small row per day instead of a scan over tasks and completions.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
+        try:
+            days = int(request.query_params.get("days", 7))
+        except ValueError:
+            days = 0
+        if not 1 <= days <= ANALYTICS_MAX_DAYS:
+            return Response(
+                {"detail": f"days must be between 1 and {ANALYTICS_MAX_DAYS}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         user = request.user
         today = date.today()
         week_start = today - timedelta(days=today.weekday())
         week_end = week_start + timedelta(days=6)
-
-        # --- PLANNER STATS (uses: date, done) ---
-        planner_qs = StudyTask.objects.filter(user=user)
-
-        # Tasks whose date falls in this week
-        tasks_this_week = planner_qs.filter(date__range=[week_start, week_end])
-
-        # Tasks done this week
-        completed_this_week = tasks_this_week.filter(done=True).count()
-
-        # Overdue = not done and date < today
-        overdue_tasks = planner_qs.filter(done=False, date__lt=today).count()
-
-        total_tasks = planner_qs.count()
+        # the *_last_7 series predate ?days=, so always cover at least a week
+        series_days = max(days, LEGACY_SERIES_DAYS)
+        range_start = today - timedelta(days=series_days - 1)
+        range_dates = [range_start + timedelta(days=i) for i in range(series_days)]
+
+        # --- PLANNER STATS (from the daily rollup) ---
+        rollups = DailyActivity.objects.filter(user=user)
+        planner = rollups.aggregate(
+            total_tasks=Coalesce(Sum("tasks_total"), 0),
+            completed_this_week=Coalesce(
+                Sum("tasks_done", filter=Q(date__range=[week_start, week_end])), 0
+            ),
+            overdue_tasks=Coalesce(
+                Sum(F("tasks_total") - F("tasks_done"), filter=Q(date__lt=today)), 0
+            ),
+        )
 
         # --- HABIT STATS ---
-        habits_qs = Habit.objects.filter(user=user, is_active=True)
-        total_habits = habits_qs.count()
-        completed_habits_today = HabitCompletion.objects.filter(
-            habit__in=habits_qs,
-            date=today,
-            completed=True,
-        ).count()
-
-        # streaks via serializer helper
-        streaks = []
-        habit_serializer = HabitSerializer()
-        for h in habits_qs:
-            streaks.append(habit_serializer.get_streak(h))
-        avg_streak = sum(streaks) / len(streaks) if streaks else 0
-        max_streak = max(streaks) if streaks else 0
+        # streak shown to users only counts runs that reach today
+        visible_streak = Case(
+            When(last_completed_date=today, then=F("current_streak")),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        habits = Habit.objects.filter(user=user, is_active=True).aggregate(
+            total_habits=Count("id"),
+            avg_streak=Avg(visible_streak),
+            max_streak=Max(visible_streak),
+        )
+        total_habits = habits["total_habits"]
 
         # --- POMODORO STATS ---
         pomodoro_stat = PomodoroStat.objects.filter(user=user).first()
         total_focus_minutes = pomodoro_stat.total_focus_minutes if pomodoro_stat else 0
         completed_sessions = pomodoro_stat.completed_sessions if pomodoro_stat else 0
 
-        # --- LAST 7 DAYS SERIES ---
-        last7 = [today - timedelta(days=i) for i in range(6, -1, -1)]
-
-        # tasks completed per day = done=True on that date
-        tasks_completed_last_7 = []
-        for d in last7:
-            done_count = planner_qs.filter(done=True, date=d).count()
-            tasks_completed_last_7.append(
-                {
-                    "date": d.isoformat(),
-                    "completed": done_count,
-                }
-            )
+        # --- DAILY SERIES ---
+        by_day = _daily_rollups(
+            rollups.filter(date__range=[range_start, today]).values(
+                "date", *ROLLUP_SERIES_FIELDS
+            ),
+            range_dates,
+        )
 
-        habit_completion_last_7 = []
-        for d in last7:
-            total = total_habits or habits_qs.count()
-            completed = HabitCompletion.objects.filter(
-                habit__in=habits_qs,
-                date=d,
-                completed=True,
-            ).count()
-            rate = completed / total if total > 0 else 0
-            habit_completion_last_7.append(
-                {
-                    "date": d.isoformat(),
-                    "completed": completed,
-                    "total": total,
-                    "completion_rate": rate,
-                }
-            )
+        tasks_completed = [
+            {"date": d.isoformat(), "completed": by_day[d]["tasks_done"]}
+            for d in range_dates
+        ]
+        habit_completion = [
+            {
+                "date": d.isoformat(),
+                "completed": by_day[d]["habits_completed"],
+                "total": total_habits,
+                "completion_rate": (
+                    by_day[d]["habits_completed"] / total_habits if total_habits else 0
+                ),
+            }
+            for d in range_dates
+        ]
+        focus = [
+            {
+                "date": d.isoformat(),
+                "minutes": by_day[d]["focus_minutes"],
+                "sessions": by_day[d]["sessions"],
+            }
+            for d in range_dates
+        ]
 
         data = {
             "today": today.isoformat(),
             "week_start": week_start.isoformat(),
             "week_end": week_end.isoformat(),
-            "planner": {
-                "total_tasks": total_tasks,
-                "completed_this_week": completed_this_week,
-                "overdue_tasks": overdue_tasks,
-            },
+            "days": days,
+            "planner": planner,
             "habits": {
                 "total_habits": total_habits,
-                "completed_today": completed_habits_today,
-                "avg_streak": round(avg_streak, 1),
-                "max_streak": max_streak,
+                "completed_today": by_day[today]["habits_completed"],
+                "avg_streak": round(habits["avg_streak"] or 0, 1),
+                "max_streak": habits["max_streak"] or 0,
             },
             "pomodoro": {
                 "total_focus_minutes": total_focus_minutes,
                 "completed_sessions": completed_sessions,
             },
             "series": {
-                "tasks_completed_last_7": tasks_completed_last_7,
-                "habit_completion_last_7": habit_completion_last_7,
+                "tasks_completed": tasks_completed[-days:],
+                "habit_completion": habit_completion[-days:],
+                "focus": focus[-days:],
+                # kept for clients written before the range was configurable
+                "tasks_completed_last_7": tasks_completed[-LEGACY_SERIES_DAYS:],
+                "habit_completion_last_7": habit_completion[-LEGACY_SERIES_DAYS:],
             },
         }
 
         return Response(data)
 
 
-class ChatAssistantView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+class ChatAssistantView(AsyncAPIView):
+    login_required = True
 
-    def post(self, request):
+    async def post(self, request):
         messages = request.data.get("messages", [])
         top_k = int(request.data.get("top_k", 4))
 
         if not isinstance(messages, list) or not messages:
-            return Response(
+            return JsonResponse(
                 {"detail": "messages must be a non-empty list."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        if request.data.get("stream"):
+            return sse_response(
+                ai.chat_with_knowledge_base_astream(
+                    messages, top_k=top_k, user_id=request.user.id
+                ),
+                label="chat",
+            )
+
         try:
-            result = chat_with_knowledge_base(messages, top_k=top_k)
-        except Exception as e:
-            print("ChatAssistantView error:", e)
-            return Response(
+            result = await ai.chat_with_knowledge_base_async(
+                messages, top_k=top_k, user_id=request.user.id
+            )
+        except Exception:
+            logger.exception("ChatAssistantView failed")
+            return JsonResponse(
                 {"detail": "Failed to generate reply."},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        return Response(result)
-
+        return JsonResponse(result)
@@ -13,8 +13,14 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 import os
 from pathlib import Path
 from datetime import timedelta
+
+from dotenv import load_dotenv
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# .env is read here, before any app module reads its MINDMATE_* settings
+load_dotenv()
+
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")  # will override in prod
 
 DEBUG = os.getenv("DEBUG", "False") == "True"
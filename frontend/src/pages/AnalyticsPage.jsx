@@ -58,8 +58,8 @@ export default function AnalyticsPage() {
   }
 
   const { planner, habits, pomodoro, series } = data;
-  const tasksSeries = series.tasks_completed_last_7;
-  const habitSeries = series.habit_completion_last_7;
+  const tasksSeries = series.tasks_completed;
+  const habitSeries = series.habit_completion;
 
   return (
     <div style={pageWrapper}>
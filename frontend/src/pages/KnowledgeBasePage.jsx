@@ -38,10 +38,28 @@ export default function KnowledgeBasePage() {
         headers: { "Content-Type": "multipart/form-data" },
       });
 
-      setUploadStatus(
-        `✅ ${res.data.document.title} indexed (${res.data.chunks_indexed} chunks).`
-      );
+      const doc = res.data.document;
       setSelectedFile(null);
+
+      // Indexing runs in the background worker; poll until it finishes.
+      let job = res.data.job;
+      while (job.status === "queued" || job.status === "running") {
+        setUploadStatus(
+          job.status === "queued"
+            ? "Queued for indexing…"
+            : `Indexing… ${job.pages_parsed}/${job.pages_total || "?"} pages, ` +
+                `${job.chunks_embedded}/${job.chunks_total || "?"} chunks`
+        );
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+        const statusRes = await apiClient.get(`/documents/${doc.id}/status/`);
+        job = statusRes.data;
+      }
+
+      if (job.status === "done") {
+        setUploadStatus(`✅ ${doc.title} indexed (${job.chunks_embedded} chunks).`);
+      } else {
+        setUploadStatus(`❌ ${job.error || "Failed to index the document."}`);
+      }
     } catch (err) {
       console.error(err);
       setUploadStatus("❌ Failed to upload or index the document.");